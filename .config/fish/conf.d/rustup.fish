@@ -1 +1,4 @@
-source "$HOME/.cargo/env.fish"
+# env_snapshot.fish (sourced first, conf.d is alphabetical) already inlines this.
+if not set -q __dotfiles_env_snapshot; and test -f "$HOME/.cargo/env.fish"
+    source "$HOME/.cargo/env.fish"
+end
@@ -1,7 +1,13 @@
 if status is-interactive
     # Commands to run in interactive sessions can go here
 end
-set -gx VOLTA_HOME "$HOME/.volta"
-set -gx PATH "$VOLTA_HOME/bin" $PATH
 
-eval "$(/home/linuxbrew/.linuxbrew/bin/brew shellenv)"
+# conf.d/env_snapshot.fish (generated by `task fish:env`) already sets up
+# Volta, Homebrew and cargo without spawning brew; fall back if it's missing.
+# cargo's env.fish is sourced by conf.d/rustup.fish in that case.
+if not set -q __dotfiles_env_snapshot
+    set -gx VOLTA_HOME "$HOME/.volta"
+    set -gx PATH "$VOLTA_HOME/bin" $PATH
+
+    eval "$(/home/linuxbrew/.linuxbrew/bin/brew shellenv)"
+end
@@ -10,7 +10,31 @@ return {
           transparent = true,
         },
       })
-      vim.cmd("colorscheme github_dark_default")
+      -- scripts/appearance.py records the system mode and its pid here while
+      -- it runs, and switches running instances itself. Without a live
+      -- watcher, follow 'background', which nvim sets from the terminal.
+      local state = (vim.env.XDG_STATE_HOME or vim.fn.expand("~/.local/state")) .. "/dotfiles/appearance"
+      local function watched_mode()
+        local file = io.open(state, "r")
+        if not file then
+          return nil
+        end
+        local mode, pid = file:read("*l"), file:read("*l")
+        file:close()
+        return pid and (vim.uv or vim.loop).fs_stat("/proc/" .. pid) and mode or nil
+      end
+      local function apply(mode)
+        vim.cmd("colorscheme " .. (mode == "light" and "github_light_default" or "github_dark_default"))
+      end
+      apply(watched_mode() or vim.o.background)
+      vim.api.nvim_create_autocmd("OptionSet", {
+        pattern = "background",
+        callback = function()
+          if not watched_mode() and (vim.g.colors_name or ""):match("^github_") then
+            apply(vim.o.background)
+          end
+        end,
+      })
     end,
   },
   {
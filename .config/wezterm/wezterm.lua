@@ -2,8 +2,34 @@ local wezterm = require "wezterm"
 local config = wezterm.config_builder()
 local action = wezterm.action
 
--- Theme based on system preference
+-- Theme based on system preference. While scripts/appearance.py is watching,
+-- it writes the mode and its pid to this file on every change. A file whose
+-- watcher is gone is ignored. The directory is what's watched for reloads:
+-- the file comes and goes with the watcher, so it may not exist right now.
+local state_dir = (os.getenv('XDG_STATE_HOME') or (wezterm.home_dir .. '/.local/state')) .. '/dotfiles'
+local appearance_file = state_dir .. '/appearance'
 local function get_appearance()
+  local dir = io.open(state_dir, 'r')
+  if dir then
+    dir:close()
+  else
+    wezterm.run_child_process({ 'mkdir', '-p', state_dir })
+  end
+  wezterm.add_to_config_reload_watch_list(state_dir)
+  local file = io.open(appearance_file, 'r')
+  if file then
+    local mode, pid = file:read('*l'), file:read('*l')
+    file:close()
+    local alive = pid and io.open('/proc/' .. pid .. '/stat', 'r')
+    if alive then
+      alive:close()
+      if mode == 'dark' then
+        return 'Dark'
+      elseif mode == 'light' then
+        return 'Light'
+      end
+    end
+  end
   if wezterm.gui then
     return wezterm.gui.get_appearance()
   end
@@ -16,11 +42,63 @@ local function scheme_for_appearance(appearance)
     return 'Github'
   end
 end
+
+-- Wallpaper: the smallest screen-covering variant from `task wallpapers:build`,
+-- never the multi-MB original. Set DOTFILES_WALLPAPER to pick one by name.
+local function wallpaper_for_appearance(appearance)
+  local cache = os.getenv('XDG_CACHE_HOME') or (wezterm.home_dir .. '/.cache')
+  local index_path = cache .. '/dotfiles/wallpapers/index.json'
+  local file = io.open(index_path, 'r')
+  if not file then
+    return nil
+  end
+  local decode = wezterm.serde and wezterm.serde.json_decode or wezterm.json_parse
+  local ok, index = pcall(decode, file:read('*a'))
+  file:close()
+  wezterm.add_to_config_reload_watch_list(index_path)
+  if not ok or type(index) ~= 'table' or type(index.wallpapers) ~= 'table' then
+    return nil
+  end
+
+  local want = appearance:find('Dark') and 'dark' or 'light'
+  local name = os.getenv('DOTFILES_WALLPAPER')
+  local screen = wezterm.gui and wezterm.gui.screens().main
+  local width, height = screen and screen.width or 1920, screen and screen.height or 1080
+  for _, wallpaper in ipairs(index.wallpapers) do
+    if (name and wallpaper.name:find(name, 1, true)) or (not name and wallpaper.appearance == want) then
+      local best, largest
+      for _, variant in pairs(wallpaper.variants) do
+        if variant.width >= width and variant.height >= height and (not best or variant.width < best.width) then
+          best = variant
+        end
+        if not largest or variant.width > largest.width then
+          largest = variant
+        end
+      end
+      return (best or largest).path
+    end
+  end
+  return nil
+end
  
  -- Appearance
 config.window_background_opacity = 0.95
 config.window_decorations = "RESIZE"
 config.color_scheme = scheme_for_appearance(get_appearance())
+local wallpaper = wallpaper_for_appearance(get_appearance())
+if wallpaper then
+  config.background = {
+    {
+      source = { File = wallpaper },
+      width = 'Cover',
+      height = 'Cover',
+      horizontal_align = 'Center',
+      vertical_align = 'Middle',
+      hsb = { brightness = 0.2 },
+      opacity = config.window_background_opacity,
+    },
+  }
+end
 config.default_cursor_style = 'BlinkingBar'
 config.tab_bar_at_bottom = true
 
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Broadcast light/dark appearance changes to WezTerm, Neovim and Zed.
+
+One watcher detects the change once and pushes the matching scheme everywhere,
+instead of each tool polling on its own:
+
+* WezTerm: writes the mode and the watcher's pid to
+  ``$XDG_STATE_HOME/dotfiles/appearance``. wezterm.lua reads it and keeps the
+  directory on its config reload watch list, so WezTerm reloads itself;
+* Neovim: sends ``:colorscheme`` as an RPC notification to every server socket
+  under ``$XDG_RUNTIME_DIR`` (and nvim's ``/tmp`` fallback);
+* Zed: rewrites ``theme.mode`` in a machine-local settings.json. The one
+  linked from this repo is left alone, and its ``"system"`` mode already makes
+  Zed follow the portal by itself.
+
+wezterm.lua and theme.lua trust the state file only while the pid in it is
+alive, and the watcher removes it on exit. Otherwise they fall back to the
+live system appearance.
+
+Changes come from the freedesktop portal (``org.freedesktop.appearance
+color-scheme``, streamed by ``gdbus monitor``) or, with ``--flag-file``, from a
+file holding ``dark`` or ``light``, watched with inotify. ``set`` writes that
+file, so a local stub can drive the watcher. The time from detection to the
+last push is reported against a 120 fps frame (WezTerm's ``max_fps``).
+
+Usage:
+    appearance.py watch [--flag-file PATH]
+    appearance.py set dark|light [--flag-file PATH]
+    appearance.py apply dark|light
+"""
+
+from __future__ import annotations
+
+import argparse
+import ctypes
+import glob
+import os
+import re
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HOME = Path.home()
+STATE_FILE = Path(os.environ.get("XDG_STATE_HOME", HOME / ".local" / "state")) / "dotfiles" / "appearance"
+RUNTIME_DIR = Path(os.environ.get("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}"))
+ZED_SETTINGS = Path(os.environ.get("XDG_CONFIG_HOME", HOME / ".config")) / "zed" / "settings.json"
+DEFAULT_FLAG = STATE_FILE.with_name("appearance.flag")
+
+NVIM_SCHEMES = {"dark": "github_dark_default", "light": "github_light_default"}
+FRAME_MS = 1000 / 120
+
+PORTAL = ("org.freedesktop.portal.Desktop", "/org/freedesktop/portal/desktop")
+PORTAL_VALUE = re.compile(r"'org\.freedesktop\.appearance',\s*'color-scheme',\s*<(?:<)?uint32 (\d)>")
+
+
+# -- pushing -------------------------------------------------------------------
+
+
+def _msgpack(obj) -> bytes:
+    """Just enough msgpack for an RPC notification: small ints, strings, arrays."""
+    if isinstance(obj, int):
+        return bytes([obj])
+    if isinstance(obj, str):
+        raw = obj.encode()
+        if len(raw) < 32:
+            return bytes([0xA0 | len(raw)]) + raw
+        return b"\xda" + struct.pack(">H", len(raw)) + raw
+    return bytes([0x90 | len(obj)]) + b"".join(_msgpack(item) for item in obj)
+
+
+def nvim_sockets() -> list[str]:
+    patterns = [str(RUNTIME_DIR / "nvim.*.0"), f"/tmp/nvim.{os.environ.get('USER', '*')}/*/nvim.*.0"]
+    return sorted({path for pattern in patterns for path in glob.glob(pattern)})
+
+
+def push_nvim(mode: str) -> int:
+    message = _msgpack([2, "nvim_command", [f"colorscheme {NVIM_SCHEMES[mode]}"]])
+    reached = 0
+    for path in nvim_sockets():
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(0.05)
+                sock.connect(path)
+                sock.sendall(message)
+            reached += 1
+        except OSError:
+            pass  # A stale socket from an nvim that has exited.
+    return reached
+
+
+def push_zed(mode: str, settings: Path) -> str:
+    try:
+        text = settings.read_text()
+    except FileNotFoundError:
+        return "not found"
+    theme = re.search(r'"theme"\s*:\s*\{[^}]*?"mode"\s*:\s*"(\w+)"', text)
+    if not theme:
+        return "no theme.mode"
+    if theme[1] == "system":
+        return "follows system"
+    if settings.resolve().is_relative_to(REPO_ROOT):
+        # Writing would dirty the tracked file on every switch.
+        return "tracked, left alone"
+    if theme[1] == mode:
+        return "unchanged"
+    updated = text[: theme.start(1)] + mode + text[theme.end(1) :]
+    with open(settings, "r+") as fh:
+        fh.write(updated)
+        fh.truncate()
+    return "updated"
+
+
+def write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text)
+    tmp.replace(path)
+
+
+def watcher_pid() -> int | None:
+    """The pid recorded in the state file, if that process is still running."""
+    try:
+        lines = STATE_FILE.read_text().split()
+    except FileNotFoundError:
+        return None
+    if len(lines) < 2 or not lines[1].isdigit() or not Path(f"/proc/{lines[1]}").exists():
+        return None
+    return int(lines[1])
+
+
+def broadcast(mode: str, zed_settings: Path, pid: int | None) -> None:
+    start = time.perf_counter()
+    # Without a live watcher, WezTerm follows the system setting on its own.
+    if pid is not None:
+        write_atomic(STATE_FILE, f"{mode}\n{pid}\n")
+    wezterm_ms = (time.perf_counter() - start) * 1000
+    nvims = push_nvim(mode)
+    nvim_ms = (time.perf_counter() - start) * 1000
+    zed = push_zed(mode, zed_settings)
+    total_ms = (time.perf_counter() - start) * 1000
+
+    verdict = "ok" if total_ms < FRAME_MS else f"over the {FRAME_MS:.1f} ms frame budget"
+    print(
+        f"{mode}: wezterm {wezterm_ms:.2f} ms, {nvims} nvim {nvim_ms - wezterm_ms:.2f} ms, "
+        f"zed {zed} {total_ms - nvim_ms:.2f} ms; "
+        f"total {total_ms:.2f} ms ({verdict})",
+        flush=True,
+    )
+
+
+# -- detecting -----------------------------------------------------------------
+
+
+def portal_mode(value: str) -> str:
+    # 1 = prefer dark; 0 (no preference) and 2 (prefer light) map to light.
+    return "dark" if value == "1" else "light"
+
+
+def watch_portal():
+    read = subprocess.run(
+        [
+            "gdbus", "call", "--session", "--dest", PORTAL[0], "--object-path", PORTAL[1],
+            "--method", "org.freedesktop.portal.Settings.Read",
+            "org.freedesktop.appearance", "color-scheme",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    current = re.search(r"uint32 (\d)", read.stdout)
+    if current:
+        yield portal_mode(current[1])
+
+    monitor = subprocess.Popen(
+        ["gdbus", "monitor", "--session", "--dest", PORTAL[0], "--object-path", PORTAL[1]],
+        stdout=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+    )
+    for line in monitor.stdout:
+        changed = PORTAL_VALUE.search(line)
+        if changed:
+            yield portal_mode(changed[1])
+
+
+def read_flag(path: Path) -> str | None:
+    try:
+        value = path.read_text().strip().lower()
+    except FileNotFoundError:
+        return None
+    return value if value in NVIM_SCHEMES else None
+
+
+def watch_file(path: Path):
+    """Yield the flag file's mode now and after every write, using inotify."""
+    IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE = 0x08, 0x80, 0x100
+    libc = ctypes.CDLL(None, use_errno=True)
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Watch the directory so atomic replaces (rename over the file) are seen.
+    if libc.inotify_add_watch(fd, bytes(path.parent), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+        raise OSError(ctypes.get_errno(), f"cannot watch {path.parent}")
+
+    mode = read_flag(path)
+    if mode:
+        yield mode
+    header = struct.Struct("iIII")
+    while True:
+        buf = os.read(fd, 4096)
+        offset = 0
+        while offset < len(buf):
+            _, _, _, length = header.unpack_from(buf, offset)
+            name = buf[offset + header.size : offset + header.size + length].rstrip(b"\0")
+            offset += header.size + length
+            if name == path.name.encode():
+                mode = read_flag(path)
+                if mode:
+                    yield mode
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    watch_p = sub.add_parser("watch", help="broadcast every appearance change")
+    watch_p.add_argument("--flag-file", type=Path, help="watch this file instead of the freedesktop portal")
+    watch_p.add_argument("--zed-settings", type=Path, default=ZED_SETTINGS)
+    set_p = sub.add_parser("set", help="write the flag file a `watch --flag-file` is following")
+    set_p.add_argument("mode", choices=sorted(NVIM_SCHEMES))
+    set_p.add_argument("--flag-file", type=Path, default=DEFAULT_FLAG)
+    apply_p = sub.add_parser("apply", help="broadcast a mode once, without watching")
+    apply_p.add_argument("mode", choices=sorted(NVIM_SCHEMES))
+    apply_p.add_argument("--zed-settings", type=Path, default=ZED_SETTINGS)
+    args = parser.parse_args(argv)
+
+    if args.command == "set":
+        write_atomic(args.flag_file, args.mode + "\n")
+        return 0
+    if args.command == "apply":
+        broadcast(args.mode, args.zed_settings, watcher_pid())
+        return 0
+
+    # Make SIGTERM/SIGHUP (logout, systemd stop) run the cleanup below too.
+    for signum in (signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, lambda *_: sys.exit(0))
+    events = watch_file(args.flag_file) if args.flag_file else watch_portal()
+    last = None
+    try:
+        for mode in events:
+            if mode != last:
+                broadcast(mode, args.zed_settings, os.getpid())
+                last = mode
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if watcher_pid() == os.getpid():
+            STATE_FILE.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Benchmark how fast this environment starts, and catch regressions.
+
+Cases:
+
+* ``fish``: ``fish -l -c exit`` through config.fish and conf.d;
+* ``nvim``: ``nvim --headless +qa`` with LazyVim and the extras in lazyvim.json;
+* ``wezterm``: evaluating wezterm.lua (``wezterm --config-file ... show-keys``);
+* ``task``: parsing Taskfile.yml (``task --list``) and a dry run of every task.
+
+Every case runs against this checkout rather than whatever ``~/.config``
+links to. ``XDG_CONFIG_HOME`` points at a temporary directory that links
+back here, and cache and state dirs are private to the run. ``cold``
+samples get a fresh, empty cache every time (and with ``--drop-caches``,
+run as root, an empty page cache too). ``warm`` samples share one cache
+after some warm-up runs.
+
+Percentiles are appended to ``bench/history.jsonl``. Each run is compared
+with the previous entry recorded on the same host, and the script exits
+non-zero when a case's median got slower than ``--threshold`` percent. A
+regressing run is not recorded, so it can't become the next baseline, unless
+``--accept`` says the slowdown is intended. Missing tools are skipped.
+
+Usage:
+    bench_startup.py [--runs N] [--only fish,nvim] [--threshold PCT] [--no-record | --accept]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HISTORY = REPO_ROOT / "bench" / "history.jsonl"
+TASKFILE = REPO_ROOT / "Taskfile.yml"
+
+# Changes smaller than this are noise, whatever the percentage.
+NOISE_FLOOR_MS = 2.0
+
+
+@dataclass
+class Case:
+    name: str
+    tool: str
+    argv: list[str]
+
+
+def cases() -> list[Case]:
+    wezterm_lua = REPO_ROOT / ".config" / "wezterm" / "wezterm.lua"
+    found = [
+        Case("fish", "fish", ["fish", "-l", "-c", "exit"]),
+        Case("nvim", "nvim", ["nvim", "--headless", "+qa"]),
+        Case("wezterm", "wezterm", ["wezterm", "--config-file", str(wezterm_lua), "show-keys"]),
+        Case("task:list", "task", ["task", "--taskfile", str(TASKFILE), "--list"]),
+    ]
+    names = re.findall(r"^  ([\w:-]+):\s*$", TASKFILE.read_text(), re.MULTILINE)
+    found += [Case(f"task:{name}", "task", ["task", "--taskfile", str(TASKFILE), "--dry", name]) for name in names]
+    return found
+
+
+def sandbox_env(root: Path, cache: Path) -> dict[str, str]:
+    config = root / "config"
+    if not config.exists():
+        config.mkdir(parents=True)
+        for entry in (REPO_ROOT / ".config").iterdir():
+            (config / entry.name).symlink_to(entry)
+    (root / "state").mkdir(exist_ok=True)
+    cache.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ)
+    env.update(
+        XDG_CONFIG_HOME=str(config),
+        XDG_CACHE_HOME=str(cache),
+        XDG_STATE_HOME=str(root / "state"),
+        # Keep interactive bits from kicking in (fish greeting, nvim UI hooks).
+        TERM="dumb",
+    )
+    return env
+
+
+def drop_page_cache() -> None:
+    try:
+        subprocess.run(["sync"], check=False)
+        Path("/proc/sys/vm/drop_caches").write_text("3\n")
+    except OSError:
+        pass  # Not root; the fresh XDG cache is the best we can do.
+
+
+def run_once(argv: list[str], env: dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(argv, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))], 2)
+
+    return {"p50": round(statistics.median(ordered), 2), "p90": pct(0.9), "p99": pct(0.99), "n": len(ordered)}
+
+
+def measure(case: Case, root: Path, runs: int, warmup: int, drop_caches: bool) -> dict[str, dict]:
+    cold = []
+    for i in range(runs):
+        cache = root / "cold" / case.name.replace(":", "_") / str(i)
+        env = sandbox_env(root, cache)
+        if drop_caches:
+            drop_page_cache()
+        cold.append(run_once(case.argv, env))
+        shutil.rmtree(cache, ignore_errors=True)
+
+    env = sandbox_env(root, root / "warm" / case.name.replace(":", "_"))
+    for _ in range(warmup):
+        run_once(case.argv, env)
+    warm = [run_once(case.argv, env) for _ in range(runs)]
+    return {"cold": percentiles(cold), "warm": percentiles(warm)}
+
+
+def last_baselines(host: str) -> dict[str, dict]:
+    """{case: the most recent entry from this host that measured it}.
+
+    Per case, so a run limited with --only doesn't hide the other cases.
+    """
+    try:
+        lines = HISTORY.read_text().splitlines()
+    except FileNotFoundError:
+        return {}
+    found = {}
+    for line in lines:
+        entry = json.loads(line)
+        if entry.get("host") == host:
+            found.update({name: entry for name in entry["results"]})
+    return found
+
+
+def git_revision() -> str:
+    out = subprocess.run(["git", "-C", str(REPO_ROOT), "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    dirty = subprocess.run(["git", "-C", str(REPO_ROOT), "diff", "--quiet", "HEAD"]).returncode != 0
+    return out.stdout.strip() + ("+dirty" if dirty else "")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15, help="samples per case and cache state")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed runs before warm samples")
+    parser.add_argument("--only", help="comma-separated case names or prefixes, e.g. fish,task:")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent (p50)")
+    parser.add_argument("--drop-caches", action="store_true", help="drop the page cache before cold runs (root)")
+    record = parser.add_mutually_exclusive_group()
+    record.add_argument("--no-record", action="store_true", help="compare only, don't append to the history")
+    record.add_argument("--accept", action="store_true", help="record this run as the baseline even if it regressed")
+    args = parser.parse_args(argv)
+
+    selected = cases()
+    if args.only:
+        prefixes = tuple(args.only.split(","))
+        selected = [c for c in selected if c.name.startswith(prefixes)]
+
+    host = platform.node()
+    baselines = last_baselines(host)
+    results, skipped = {}, []
+    root = Path(tempfile.mkdtemp(prefix="bench-startup-"))
+    try:
+        for case in selected:
+            if shutil.which(case.tool) is None:
+                skipped.append(case.name)
+                continue
+            results[case.name] = measure(case, root, args.runs, args.warmup, args.drop_caches)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    regressions = []
+    print(f"{'case':<24} {'cache':<5} {'p50':>9} {'p90':>9} {'p99':>9}  vs baseline")
+    for name, modes in results.items():
+        for mode, stats in modes.items():
+            baseline = baselines.get(name)
+            before = baseline["results"][name].get(mode) if baseline else None
+            delta = ""
+            if before:
+                change = stats["p50"] - before["p50"]
+                pct = 100 * change / before["p50"] if before["p50"] else 0.0
+                delta = f"{pct:+.1f}%"
+                if pct > args.threshold and change > NOISE_FLOOR_MS:
+                    delta += "  REGRESSION"
+                    regressions.append(f"{name} ({mode})")
+            if before:
+                delta += f"  (vs {baseline['revision']})"
+            print(
+                f"{name:<24} {mode:<5} {stats['p50']:>7.1f}ms {stats['p90']:>7.1f}ms {stats['p99']:>7.1f}ms  {delta}"
+            )
+    if skipped:
+        print(f"skipped (not installed): {', '.join(skipped)}")
+
+    if regressions and not args.accept:
+        print("not recorded; rerun with --accept if the slowdown is intended")
+    elif results and not args.no_record:
+        HISTORY.parent.mkdir(exist_ok=True)
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "host": host,
+            "runs": args.runs,
+            "results": results,
+        }
+        with HISTORY.open("a") as fh:
+            fh.write(json.dumps(entry, sort_keys=True) + "\n")
+        print(f"recorded in {HISTORY.relative_to(REPO_ROOT)}")
+
+    if regressions and not args.accept:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0f}%: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Sync Claude Code marketplaces and plugins with claude-plugins.lock.json.
+
+The installed state is read once, with one ``claude plugin list --json`` and one
+``claude plugin marketplace list --json`` call run side by side. It is then
+diffed against the lockfile. Only what is missing, or installed at a version
+other than the pinned one, gets installed. A plugin is skipped when adding
+its marketplace failed.
+
+The steps run one at a time. Each ``claude plugin`` write rewrites the shared
+plugin and settings JSON under ``~/.claude`` without locking, so two steps
+running at once can lose each other's changes.
+
+A plugin with ``"version": null`` is satisfied by any installed version. The
+CLI can only update a plugin to its latest version, so pins are checked, not
+enforced. A plugin still off its pin after the update is reported as
+``cannot pin``. ``pin`` writes the currently installed versions into the lockfile.
+
+Set ``CLAUDE_BIN`` (or pass ``--claude``) to run against a stand-in executable,
+such as ``scripts/cc_sync_stub.py``.
+
+Usage:
+    cc_sync.py [sync] [--dry-run]
+    cc_sync.py pin
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+LOCKFILE = REPO_ROOT / "claude-plugins.lock.json"
+
+
+@dataclass
+class Step:
+    key: str
+    argv: list[str]
+    deps: list[str] = field(default_factory=list)
+    status: str = "pending"
+    seconds: float = 0.0
+    output: str = ""
+
+
+def run_claude(claude: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([claude, *args], capture_output=True, text=True)
+
+
+def _source_key(source) -> str:
+    """Normalise a marketplace source to something comparable, e.g. ``owner/repo``."""
+    if isinstance(source, dict):
+        source = source.get("repo") or source.get("url") or source.get("path") or ""
+    source = str(source).removesuffix(".git").rstrip("/")
+    for prefix in ("https://github.com/", "git@github.com:"):
+        source = source.removeprefix(prefix)
+    return source
+
+
+def read_installed(claude: str) -> tuple[dict[str, str | None], set[str]]:
+    """Return ({plugin id: version}, {marketplace names and sources})."""
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        plugins_f = pool.submit(run_claude, claude, "plugin", "list", "--json")
+        markets_f = pool.submit(run_claude, claude, "plugin", "marketplace", "list", "--json")
+        plugins_out, markets_out = plugins_f.result(), markets_f.result()
+
+    for out in (plugins_out, markets_out):
+        if out.returncode != 0:
+            raise SystemExit(f"error: `{' '.join(out.args)}` failed:\n{out.stderr.strip()}")
+
+    plugins = {}
+    for entry in json.loads(plugins_out.stdout or "[]"):
+        plugin_id = entry.get("id")
+        if not plugin_id and entry.get("marketplace"):
+            plugin_id = f"{entry['name']}@{entry['marketplace']}"
+        if plugin_id:
+            plugins[plugin_id] = entry.get("version")
+
+    markets = set()
+    for entry in json.loads(markets_out.stdout or "[]"):
+        if entry.get("name"):
+            markets.add(entry["name"])
+        if entry.get("source"):
+            markets.add(_source_key(entry["source"]))
+    return plugins, markets
+
+
+def build_plan(lock: dict, plugins: dict[str, str | None], markets: set[str]) -> list[Step]:
+    steps = []
+    market_steps = {}
+    for market in lock["marketplaces"]:
+        source = market["source"]
+        if market.get("name") in markets or _source_key(source) in markets:
+            continue
+        key = f"marketplace {market.get('name') or source}"
+        steps.append(Step(key, ["plugin", "marketplace", "add", source]))
+        if market.get("name"):
+            market_steps[market["name"]] = key
+
+    for plugin_id, spec in lock["plugins"].items():
+        pinned = (spec or {}).get("version")
+        market = plugin_id.partition("@")[2]
+        deps = [market_steps[market]] if market in market_steps else []
+        if plugin_id not in plugins:
+            steps.append(Step(f"install {plugin_id}", ["plugin", "install", plugin_id], deps))
+        elif pinned and plugins[plugin_id] != pinned:
+            key = f"update {plugin_id} ({plugins[plugin_id]} -> {pinned})"
+            steps.append(Step(key, ["plugin", "update", plugin_id], deps))
+    return steps
+
+
+def execute(claude: str, steps: list[Step]) -> None:
+    """Run steps in order, skipping those whose dependencies did not succeed."""
+    by_key = {step.key: step for step in steps}
+    for step in steps:
+        blocker = next((d for d in step.deps if by_key[d].status != "ok"), None)
+        if blocker:
+            step.status = "skipped"
+            print(f"  skipped {step.key} ({blocker} {by_key[blocker].status})", flush=True)
+            continue
+        start = time.perf_counter()
+        out = run_claude(claude, *step.argv)
+        step.seconds = time.perf_counter() - start
+        step.output = (out.stdout + out.stderr).strip()
+        step.status = "ok" if out.returncode == 0 else "failed"
+        print(f"  {step.status:<7} {step.key} ({step.seconds * 1000:.0f} ms)", flush=True)
+        if step.status == "failed" and step.output:
+            print("          " + step.output.replace("\n", "\n          "), file=sys.stderr)
+
+
+def verify_pins(claude: str, lock: dict, steps: list[Step]) -> None:
+    """Mark updates that didn't reach the pinned version."""
+    updates = [s for s in steps if s.argv[:2] == ["plugin", "update"] and s.status == "ok"]
+    if not updates:
+        return
+    plugins, _ = read_installed(claude)
+    for step in updates:
+        plugin_id = step.argv[2]
+        pinned, installed = lock["plugins"][plugin_id]["version"], plugins.get(plugin_id)
+        if installed != pinned:
+            step.status = "cannot pin"
+            print(
+                f"  cannot pin {plugin_id}: {installed} installed, {pinned} pinned "
+                "(the CLI only updates to the latest; `task cc:pin` accepts it)",
+                file=sys.stderr,
+            )
+
+
+def pin(claude: str, lock: dict) -> int:
+    plugins, _ = read_installed(claude)
+    missing = [p for p in lock["plugins"] if p not in plugins]
+    for plugin_id in lock["plugins"]:
+        if plugin_id in plugins:
+            lock["plugins"][plugin_id] = {"version": plugins[plugin_id]}
+    LOCKFILE.write_text(json.dumps(lock, indent=2) + "\n")
+    print(f"pinned {len(lock['plugins']) - len(missing)} plugin(s) in {LOCKFILE.name}")
+    for plugin_id in missing:
+        print(f"  not installed, left unpinned: {plugin_id}")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("sync", "pin"), nargs="?", default="sync")
+    parser.add_argument("--claude", default=os.environ.get("CLAUDE_BIN", "claude"))
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without installing")
+    args = parser.parse_args(argv)
+
+    lock = json.loads(LOCKFILE.read_text())
+    if args.command == "pin":
+        return pin(args.claude, lock)
+
+    start = time.perf_counter()
+    plugins, markets = read_installed(args.claude)
+    steps = build_plan(lock, plugins, markets)
+    read_ms = (time.perf_counter() - start) * 1000
+    print(f"read installed state in {read_ms:.0f} ms")
+
+    if not steps:
+        print(f"{len(lock['plugins'])} plugin(s) and {len(lock['marketplaces'])} marketplace(s) up to date")
+        return 0
+    if args.dry_run:
+        for step in steps:
+            print(f"  would {step.key}")
+        return 0
+
+    execute(args.claude, steps)
+    verify_pins(args.claude, lock, steps)
+    total = time.perf_counter() - start
+    failed = [s for s in steps if s.status != "ok"]
+    print(f"{len(steps) - len(failed)} step(s) done, {len(failed)} failed, skipped or off pin in {total:.1f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
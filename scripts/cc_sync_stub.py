@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""A stand-in ``claude`` executable for trying cc_sync.py without touching ~/.claude.
+
+It understands the plugin subcommands cc_sync.py runs and keeps its state in
+one JSON file. Like the real CLI, it does an unlocked read-modify-write of that
+file, so overlapping writers lose updates.
+
+Environment:
+    CC_STUB_STATE    state file (default: $TMPDIR/cc-sync-stub.json)
+    CC_STUB_DELAY    seconds each write step takes (default 0.2)
+    CC_STUB_LATEST   version that install/update installs (default 1.0.0)
+    CC_STUB_FAIL     fail any step whose arguments contain this string
+
+Usage:
+    CLAUDE_BIN=scripts/cc_sync_stub.py scripts/cc_sync.py [sync|pin]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+STATE = Path(os.environ.get("CC_STUB_STATE", Path(tempfile.gettempdir()) / "cc-sync-stub.json"))
+
+
+def load() -> dict:
+    try:
+        return json.loads(STATE.read_text())
+    except FileNotFoundError:
+        return {"plugins": {}, "marketplaces": []}
+
+
+def main(argv: list[str]) -> int:
+    fail = os.environ.get("CC_STUB_FAIL")
+    if fail and fail in " ".join(argv):
+        print(f"stub: refusing {' '.join(argv)}", file=sys.stderr)
+        return 1
+
+    state = load()
+    match argv:
+        case ["plugin", "list", "--json"]:
+            print(json.dumps([{"id": k, "version": v} for k, v in state["plugins"].items()]))
+            return 0
+        case ["plugin", "marketplace", "list", "--json"]:
+            print(json.dumps(state["marketplaces"]))
+            return 0
+        case ["plugin", "marketplace", "add", source]:
+            time.sleep(float(os.environ.get("CC_STUB_DELAY", "0.2")))
+            name = source.rstrip("/").rpartition("/")[2]
+            state["marketplaces"].append({"name": name, "source": source})
+        case ["plugin", "install" | "update", plugin_id]:
+            time.sleep(float(os.environ.get("CC_STUB_DELAY", "0.2")))
+            state["plugins"][plugin_id] = os.environ.get("CC_STUB_LATEST", "1.0.0")
+        case _:
+            print(f"stub: unsupported command: {' '.join(argv)}", file=sys.stderr)
+            return 2
+    STATE.write_text(json.dumps(state, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
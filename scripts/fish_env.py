@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Snapshot the Volta, Homebrew and rustup environment into a static fish file.
+
+config.fish used to run ``eval "$(brew shellenv)"`` in every shell, and WezTerm
+starts a login shell per tab, so every tab paid for a Homebrew subprocess. This
+script resolves that environment once and writes it to
+``.config/fish/conf.d/env_snapshot.fish``, which fish sources without spawning
+anything.
+
+The snapshot records a fingerprint of its inputs (brew prefix and executable,
+cargo env file, Volta bin directory). It is rebuilt only when that fingerprint
+changes.
+
+Usage:
+    fish_env.py               rebuild the snapshot if its inputs changed
+    fish_env.py --force       rebuild unconditionally
+    fish_env.py --check       report drift and the startup time saved
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SNAPSHOT = REPO_ROOT / ".config" / "fish" / "conf.d" / "env_snapshot.fish"
+
+HOME = Path.home()
+BREW_CANDIDATES = (
+    Path("/home/linuxbrew/.linuxbrew/bin/brew"),
+    HOME / ".linuxbrew" / "bin" / "brew",
+    Path("/opt/homebrew/bin/brew"),
+    Path("/usr/local/bin/brew"),
+)
+CARGO_ENV = Path(os.environ.get("CARGO_HOME", HOME / ".cargo")) / "env.fish"
+VOLTA_HOME = Path(os.environ.get("VOLTA_HOME", HOME / ".volta"))
+
+FINGERPRINT_PREFIX = "# fingerprint: "
+
+
+def find_brew() -> Path | None:
+    override = os.environ.get("DOTFILES_BREW")
+    if override:
+        return Path(override)
+    for candidate in BREW_CANDIDATES:
+        if candidate.is_file() and os.access(candidate, os.X_OK):
+            return candidate
+    return None
+
+
+def _stat_key(path: Path) -> list:
+    try:
+        st = path.stat()
+    except OSError:
+        return [str(path), None]
+    return [str(path), st.st_mtime_ns, st.st_size]
+
+
+def fingerprint(brew: Path | None) -> str:
+    """Hash everything the generated snapshot depends on.
+
+    Only stat() calls, so computing it is far cheaper than running brew.
+    """
+    inputs = {
+        "brew": _stat_key(brew) if brew else None,
+        "brew_real": str(brew.resolve()) if brew else None,
+        "cargo_env": _stat_key(CARGO_ENV),
+        "volta_bin": _stat_key(VOLTA_HOME / "bin"),
+        "volta_home": str(VOLTA_HOME),
+    }
+    blob = json.dumps(inputs, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def brew_shellenv(brew: Path) -> str:
+    # shellenv prints nothing when PATH already starts with the Homebrew bin
+    # dirs, as it does in any shell that sourced the snapshot; hide them.
+    out = subprocess.run(
+        [str(brew), "shellenv", "fish"],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PATH": "/usr/bin:/bin"},
+    )
+    text = out.stdout.strip()
+    if not text:
+        raise SystemExit(f"error: `{brew} shellenv fish` printed nothing")
+    return text
+
+
+def render(brew: Path | None, digest: str) -> str:
+    lines = [
+        "# Generated by scripts/fish_env.py -- do not edit.",
+        "# Rebuild with `task fish:env` (or `task fish:env -- --force`).",
+        f"{FINGERPRINT_PREFIX}{digest}",
+        "",
+        "set -g __dotfiles_env_snapshot " + digest,
+        "",
+        "# Volta",
+        f'set -gx VOLTA_HOME "{VOLTA_HOME}"',
+        'fish_add_path --global --move --path "$VOLTA_HOME/bin"',
+        "",
+    ]
+    if brew is not None:
+        lines += ["# Homebrew (brew shellenv fish)", brew_shellenv(brew), ""]
+    if CARGO_ENV.is_file():
+        lines += [f"# rustup/cargo ({CARGO_ENV})", CARGO_ENV.read_text().strip(), ""]
+
+    # Refresh in the background after a command that can change the inputs,
+    # so a new shell never has to pay for the check itself.
+    script = Path(__file__).resolve()
+    lines += [
+        "function __dotfiles_env_refresh --on-event fish_postexec",
+        "    string match -qr '^\\s*(brew|rustup|volta)\\s' -- $argv[1]; or return",
+        f'    command python3 "{script}" --quiet &',
+        "    disown",
+        "end",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def read_fingerprint() -> str | None:
+    try:
+        with SNAPSHOT.open() as fh:
+            for line in fh:
+                if line.startswith(FINGERPRINT_PREFIX):
+                    return line[len(FINGERPRINT_PREFIX) :].strip()
+    except FileNotFoundError:
+        return None
+    return None
+
+
+def write_snapshot(text: str) -> None:
+    SNAPSHOT.parent.mkdir(parents=True, exist_ok=True)
+    tmp = SNAPSHOT.with_suffix(".tmp")
+    tmp.write_text(text)
+    tmp.replace(SNAPSHOT)
+
+
+def _time_ms(fn, samples: int) -> float:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def check(brew: Path | None, samples: int) -> int:
+    current = fingerprint(brew)
+    recorded = read_fingerprint()
+    if recorded is None:
+        print(f"snapshot: missing ({SNAPSHOT})")
+    elif recorded != current:
+        print(f"snapshot: stale (recorded {recorded}, inputs now {current})")
+    else:
+        print(f"snapshot: up to date ({current})")
+
+    drift = False
+    if brew is not None and recorded is not None:
+        live = brew_shellenv(brew)
+        if live not in SNAPSHOT.read_text():
+            drift = True
+            print("drift: `brew shellenv` output differs from the snapshot")
+    if CARGO_ENV.is_file() and recorded is not None:
+        if CARGO_ENV.read_text().strip() not in SNAPSHOT.read_text():
+            drift = True
+            print(f"drift: {CARGO_ENV} differs from the snapshot")
+
+    if brew is not None:
+        dynamic = _time_ms(lambda: brew_shellenv(brew), samples)
+        cached = _time_ms(lambda: SNAPSHOT.read_bytes() if SNAPSHOT.exists() else b"", samples)
+        print(
+            f"startup: brew shellenv {dynamic:.1f} ms vs snapshot read {cached:.2f} ms "
+            f"(~{dynamic - cached:.1f} ms saved per shell, median of {samples})"
+        )
+    else:
+        print("startup: brew not found, nothing to measure")
+
+    stale = recorded != current or drift
+    return 1 if stale else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="rebuild even if inputs are unchanged")
+    parser.add_argument("--check", action="store_true", help="report drift and time saved, do not write")
+    parser.add_argument("--samples", type=int, default=5, help="timing samples for --check")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    brew = find_brew()
+    if args.check:
+        return check(brew, args.samples)
+
+    digest = fingerprint(brew)
+    if not args.force and read_fingerprint() == digest:
+        if not args.quiet:
+            print(f"{SNAPSHOT.name}: up to date")
+        return 0
+
+    write_snapshot(render(brew, digest))
+    if not args.quiet:
+        print(f"{SNAPSHOT.name}: written ({digest})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
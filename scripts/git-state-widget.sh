@@ -0,0 +1,26 @@
+#!/usr/bin/env bash
+# Print one cached git field (branch, changes or worktree) for a ccstatusline
+# custom-command widget. Only bash builtins run on the hot path. Touching
+# last_read keeps the daemon alive and lets it rescan unstaged edits. When the
+# cache is missing or the daemon in daemon.lock is gone, start
+# scripts/git_state.py for this repository and print nothing this time.
+field=${1:?usage: git-state-widget.sh branch|changes|worktree}
+
+cd -P . 2>/dev/null || exit 0
+dir=$PWD
+while [[ $dir && ! -e $dir/.git ]]; do
+  dir=${dir%/*}
+done
+[[ -e ${dir:-/}/.git ]] || exit 0
+dir=${dir:-/}
+
+cache=${XDG_RUNTIME_DIR:-/tmp}/dotfiles-git/${dir//\//%}
+pid=
+{ read -r pid <"$cache/daemon.lock"; } 2>/dev/null
+if [[ $pid && -e /proc/$pid && -e $cache/$field ]]; then
+  IFS= read -r line <"$cache/$field"
+  printf '%s' "$line"
+  { : >"$cache/last_read"; } 2>/dev/null
+else
+  nohup python3 "${BASH_SOURCE[0]%/*}/git_state.py" serve "$dir" >/dev/null 2>&1 &
+fi
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""Cache a repository's branch, changes and worktree for the ccstatusline widgets.
+
+The built-in ``git-branch``, ``git-changes`` and ``git-worktree`` widgets run
+their own git commands on every status line refresh, and in a large repo
+``git-changes`` scans the whole working tree each time. ``serve`` runs one
+small daemon per repository instead. It works out all three values in a
+single pass: HEAD is read directly and one ``git diff HEAD --shortstat`` runs.
+The results go into plain files under
+``$XDG_RUNTIME_DIR/dotfiles-git/<repo path>/``.
+
+The daemon recomputes when inotify reports a change to HEAD, the index,
+refs or packed-refs. It watches new ref directories (``refs/heads/feature/``)
+as they appear. ``scripts/git-state-widget.sh`` only reads those files,
+touches ``last_read`` and starts the daemon when it isn't running.
+
+Unstaged edits don't touch ``.git``. A read is what prompts the daemon to pick
+them up, at most once every ``--stale`` seconds, so the work tree is only
+scanned while a status line is showing it. ``--refresh`` adds a periodic rescan
+on top of that. The daemon exits, and removes its cache, once nothing has read
+it for ``--idle`` minutes.
+
+``bench`` compares both approaches on a synthetic repository.
+
+Usage:
+    git_state.py serve [REPO] [--stale SECONDS] [--idle MINUTES] [--refresh SECONDS]
+    git_state.py bench [--files N] [--renders N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import ctypes
+import fcntl
+import os
+import re
+import select
+import shutil
+import signal
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CACHE_ROOT = Path(os.environ.get("XDG_RUNTIME_DIR", "/tmp")) / "dotfiles-git"
+WIDGET = Path(__file__).resolve().with_name("git-state-widget.sh")
+
+IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x02, 0x08, 0x80, 0x100, 0x200
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+# Lock files git writes while updating; the rename that follows is what matters.
+IGNORED = re.compile(rb"\.lock$")
+
+
+def cache_dir(toplevel: Path) -> Path:
+    """Must match the path the widget script derives from $PWD."""
+    return CACHE_ROOT / str(toplevel).replace("/", "%")
+
+
+def git(repo: Path, *args: str) -> str:
+    out = subprocess.run(
+        ["git", "--no-optional-locks", "-C", str(repo), *args],
+        capture_output=True,
+        text=True,
+    )
+    return out.stdout.strip() if out.returncode == 0 else ""
+
+
+class Repo:
+    def __init__(self, path: Path):
+        info = git(path, "rev-parse", "--show-toplevel", "--absolute-git-dir", "--git-common-dir").splitlines()
+        if len(info) != 3:
+            raise SystemExit(f"error: {path} is not inside a git work tree")
+        self.toplevel, self.git_dir = Path(info[0]), Path(info[1])
+        common = Path(info[2])
+        self.common_dir = common if common.is_absolute() else (self.toplevel / common).resolve()
+        # A linked worktree has its own git dir under <common>/worktrees/<name>.
+        self.worktree = self.git_dir.name if self.git_dir != self.common_dir else ""
+        self.out = cache_dir(self.toplevel)
+
+    def branch(self) -> str:
+        head = (self.git_dir / "HEAD").read_text().strip()
+        if head.startswith("ref: refs/heads/"):
+            return head[len("ref: refs/heads/") :]
+        return head[:7]  # detached
+
+    def changes(self) -> tuple[int, int, int]:
+        """(files changed, insertions, deletions) of the work tree against HEAD."""
+        stat = git(self.toplevel, "diff", "HEAD", "--shortstat")
+        counts = []
+        for pattern in (r"(\d+) files? changed", r"(\d+) insertions?", r"(\d+) deletions?"):
+            match = re.search(pattern, stat)
+            counts.append(int(match[1]) if match else 0)
+        return counts[0], counts[1], counts[2]
+
+    def render(self) -> dict[str, str]:
+        branch = self.branch()
+        files, added, removed = self.changes()
+        return {
+            "branch": f"⎇ {branch}",
+            "changes": f"(+{added},-{removed})" if files else "",
+            "worktree": f"𖠰 {self.worktree}" if self.worktree else "",
+            "state": f"branch={branch}\nfiles={files}\ninsertions={added}\ndeletions={removed}\n"
+            f"worktree={self.worktree}\nupdated={time.time():.3f}\n",
+        }
+
+    def write(self) -> None:
+        self.out.mkdir(parents=True, exist_ok=True)
+        for name, text in self.render().items():
+            path = self.out / name
+            try:
+                if path.read_text() == text:
+                    continue
+            except FileNotFoundError:
+                pass
+            tmp = self.out / f".{name}.tmp"
+            tmp.write_text(text)
+            tmp.replace(path)
+
+    def watch_dirs(self) -> list[Path]:
+        dirs = {self.git_dir, self.common_dir}
+        for refs in (self.common_dir / "refs" / "heads", self.common_dir / "refs" / "remotes"):
+            dirs.update(p for p in [refs, *refs.rglob("*")] if p.is_dir())
+        return sorted(dirs)
+
+
+class Inotify:
+    def __init__(self):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: dict[int, Path] = {}
+        self.header = struct.Struct("iIII")
+
+    def add(self, directory: Path, mask: int = WATCH_MASK) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, bytes(directory), mask)
+        if wd >= 0:
+            self.dirs[wd] = directory
+        return wd
+
+    def read(self) -> list[tuple[int, int, bytes]]:
+        """Return [(wd, mask, name)] for the events queued so far."""
+        buf = os.read(self.fd, 65536)
+        events, offset = [], 0
+        while offset < len(buf):
+            wd, mask, _, length = self.header.unpack_from(buf, offset)
+            name = buf[offset + self.header.size : offset + self.header.size + length].rstrip(b"\0")
+            offset += self.header.size + length
+            events.append((wd, mask, name))
+        return events
+
+
+def serve(args: argparse.Namespace) -> int:
+    repo = Repo(Path(args.repo).resolve())
+    repo.out.mkdir(parents=True, exist_ok=True)
+    lock = open(repo.out / "daemon.lock", "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return 0  # Another daemon already serves this repository.
+    lock.write(f"{os.getpid()}\n")
+    lock.flush()
+
+    # The widget trusts the cache only while it exists and our pid is alive;
+    # remove it however we exit so a stale branch is never shown.
+    for signum in (signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, lambda *_: sys.exit(0))
+    try:
+        last_read = repo.out / "last_read"
+        last_read.touch()
+        inotify = Inotify()
+        for directory in repo.watch_dirs():
+            inotify.add(directory)
+        reads = inotify.add(repo.out, IN_CLOSE_WRITE)
+        refs = repo.common_dir / "refs"
+
+        def handle(events: list[tuple[int, int, bytes]]) -> tuple[bool, bool]:
+            """Return (git state changed, a widget read the cache)."""
+            changed = demanded = False
+            for wd, mask, name in events:
+                if wd == reads:
+                    demanded |= name == b"last_read"
+                    continue
+                parent = inotify.dirs.get(wd)
+                if parent is not None and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    new = parent / os.fsdecode(name)
+                    if new.is_relative_to(refs):
+                        for directory in [new, *new.rglob("*")]:
+                            if directory.is_dir():
+                                inotify.add(directory)
+                changed |= not IGNORED.search(name)
+            return changed, demanded
+
+        repo.write()
+        computed = time.monotonic()
+        while repo.toplevel.exists():
+            try:
+                idle_left = last_read.stat().st_mtime + args.idle * 60 - time.time()
+            except FileNotFoundError:
+                break
+            if idle_left <= 0:
+                break
+            timeout = min(idle_left, args.refresh) if args.refresh else idle_left
+            ready, _, _ = select.select([inotify.fd], [], [], timeout)
+            if ready:
+                changed, demanded = handle(inotify.read())
+                if changed:
+                    # Let a burst of ref/index updates settle before recomputing.
+                    time.sleep(0.02)
+                    while select.select([inotify.fd], [], [], 0)[0]:
+                        handle(inotify.read())
+                elif not (demanded and time.monotonic() - computed >= args.stale):
+                    continue
+            elif not (args.refresh and time.monotonic() - computed >= args.refresh):
+                continue
+            repo.write()
+            computed = time.monotonic()
+    finally:
+        shutil.rmtree(repo.out, ignore_errors=True)
+    return 0
+
+
+# -- benchmark -----------------------------------------------------------------
+
+
+def _percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"median {statistics.median(samples):7.2f} ms  p95 {p95:7.2f} ms"
+
+
+def _time(fn, renders: int) -> list[float]:
+    timings = []
+    for _ in range(renders):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def bench(args: argparse.Namespace) -> int:
+    root = Path(tempfile.mkdtemp(prefix="git-state-bench-"))
+    try:
+        repo = root / "repo"
+        env = {**os.environ, "GIT_AUTHOR_NAME": "bench", "GIT_AUTHOR_EMAIL": "bench@example.com",
+               "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@example.com"}
+        subprocess.run(["git", "init", "-q", "-b", "main", str(repo)], check=True)
+        for i in range(args.files):
+            directory = repo / f"pkg{i // 500:03d}"
+            directory.mkdir(exist_ok=True)
+            (directory / f"file{i}.txt").write_text(f"line {i}\n" * 20)
+        subprocess.run(["git", "-C", str(repo), "add", "-A"], check=True)
+        subprocess.run(["git", "-C", str(repo), "commit", "-qm", "bench"], check=True, env=env)
+        for i in range(0, args.files, max(1, args.files // 50)):
+            with open(repo / f"pkg{i // 500:03d}" / f"file{i}.txt", "a") as fh:
+                fh.write("changed\n")
+
+        def uncached() -> None:
+            # Roughly what the three built-in widgets run per refresh.
+            for cmd in (["branch", "--show-current"], ["diff", "--shortstat"],
+                        ["diff", "--cached", "--shortstat"], ["rev-parse", "--git-dir"]):
+                subprocess.run(["git", "-C", str(repo), *cmd], capture_output=True)
+
+        env_widget = {**os.environ, "XDG_RUNTIME_DIR": str(root / "run")}
+        (root / "run").mkdir()
+        daemon = subprocess.Popen(
+            [sys.executable, __file__, "serve", str(repo)],
+            env=env_widget,
+            stdout=subprocess.DEVNULL,
+        )
+        out = root / "run" / "dotfiles-git" / str(repo.resolve()).replace("/", "%")
+        for _ in range(200):
+            if (out / "state").exists():
+                break
+            time.sleep(0.05)
+
+        def widget() -> None:
+            for field in ("branch", "changes", "worktree"):
+                subprocess.run([str(WIDGET), field], cwd=repo, env=env_widget, capture_output=True)
+
+        def read() -> None:
+            for field in ("branch", "changes", "worktree"):
+                (out / field).read_bytes()
+
+        print(f"synthetic repo: {args.files} files, {len(range(0, args.files, max(1, args.files // 50)))} modified")
+        print(f"  git per render        {_percentiles(_time(uncached, args.renders))}")
+        print(f"  cached, widget script {_percentiles(_time(widget, args.renders))}")
+        print(f"  cached, file read     {_percentiles(_time(read, args.renders))}")
+        daemon.terminate()
+        daemon.wait()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_p = sub.add_parser("serve", help="keep the cache for one repository up to date")
+    serve_p.add_argument("repo", nargs="?", default=".")
+    serve_p.add_argument(
+        "--stale", type=float, default=5.0, help="rescan the work tree on a read if the cache is older than N seconds"
+    )
+    serve_p.add_argument("--idle", type=float, default=10.0, help="exit after N minutes without a read")
+    serve_p.add_argument("--refresh", type=float, default=0.0, help="also rescan every N seconds (0 = never)")
+    bench_p = sub.add_parser("bench", help="compare widget render latency with and without the cache")
+    bench_p.add_argument("--files", type=int, default=20000)
+    bench_p.add_argument("--renders", type=int, default=30)
+    args = parser.parse_args(argv)
+    return serve(args) if args.command == "serve" else bench(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Symlink the dotfiles into place from links.json.
+
+links.json maps each target (under ``~``) to a path in this repo. Targets are
+checked in parallel, and the resulting plan is printed before anything
+changes. Only the links that differ are touched.
+
+The linker records the links it owns in ``$XDG_STATE_HOME/dotfiles/links.json``.
+That lets it prune links that were dropped from the manifest without ever
+removing something it didn't create. On a machine that is already
+provisioned, a re-run stats a handful of paths and exits.
+
+Usage:
+    link.py plan               show what would change
+    link.py apply [--backup]   apply the plan; --backup moves conflicting files aside
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MANIFEST = REPO_ROOT / "links.json"
+
+# Plan actions, in the order they are printed.
+OK, CREATE, RELINK, PRUNE, CONFLICT = "ok", "create", "relink", "prune", "conflict"
+SYMBOLS = {OK: "=", CREATE: "+", RELINK: "~", PRUNE: "-", CONFLICT: "!"}
+
+
+@dataclass
+class Step:
+    action: str
+    target: Path
+    source: Path | None
+    detail: str = ""
+
+
+def state_file(home: Path) -> Path:
+    base = os.environ.get("XDG_STATE_HOME") or home / ".local" / "state"
+    return Path(base) / "dotfiles" / "links.json"
+
+
+def load_manifest(home: Path) -> dict[Path, Path]:
+    data = json.loads(MANIFEST.read_text())
+    links = {}
+    for target, source in data["links"].items():
+        if target.startswith("~/"):
+            target = str(home / target[2:])
+        links[Path(target)] = REPO_ROOT / source
+    return links
+
+
+def load_owned(path: Path) -> dict[Path, Path]:
+    try:
+        data = json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return {Path(t): Path(s) for t, s in data.get("links", {}).items()}
+
+
+def save_owned(path: Path, owned: dict[Path, Path]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"repo": str(REPO_ROOT), "links": {str(t): str(s) for t, s in sorted(owned.items())}}
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=2) + "\n")
+    tmp.replace(path)
+
+
+def inspect(target: Path, source: Path | None, owned: dict[Path, Path]) -> Step:
+    """Work out what to do with a single target. Only lstat/readlink calls."""
+    try:
+        current = os.readlink(target)
+    except FileNotFoundError:
+        return Step(CREATE, target, source) if source else Step(OK, target, None, "already gone")
+    except OSError:
+        # Exists but isn't a symlink: a real file or directory.
+        if source is None:
+            return Step(OK, target, None, "no longer a link, left alone")
+        return Step(CONFLICT, target, source, "exists and is not a symlink")
+
+    current_path = Path(current)
+    if not current_path.is_absolute():
+        current_path = target.parent / current_path
+
+    if source is None:
+        # Dropped from the manifest: only remove it if it still points where we put it.
+        if current_path == owned.get(target):
+            return Step(PRUNE, target, current_path)
+        return Step(OK, target, None, "repointed elsewhere, left alone")
+
+    if current_path == source:
+        return Step(OK, target, source)
+    if target in owned or not current_path.exists():
+        return Step(RELINK, target, source, f"was -> {current}")
+    return Step(CONFLICT, target, source, f"symlink to {current}")
+
+
+def plan(links: dict[Path, Path], owned: dict[Path, Path], jobs: int) -> list[Step]:
+    pairs = list(links.items()) + [(t, None) for t in owned if t not in links]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        steps = list(pool.map(lambda p: inspect(p[0], p[1], owned), pairs))
+    order = list(SYMBOLS)
+    return sorted(steps, key=lambda s: (order.index(s.action), str(s.target)))
+
+
+def apply_step(step: Step, backup: bool) -> str | None:
+    """Carry out one step; return an error message instead of raising."""
+    try:
+        if step.action == CONFLICT:
+            if not backup:
+                return "conflict (re-run with --backup to move it aside)"
+            aside = step.target.with_name(f"{step.target.name}.bak-{int(time.time())}")
+            step.target.rename(aside)
+        elif step.action in (RELINK, PRUNE):
+            step.target.unlink()
+        if step.action in (CREATE, RELINK, CONFLICT):
+            step.target.parent.mkdir(parents=True, exist_ok=True)
+            step.target.symlink_to(step.source)
+    except OSError as exc:
+        return str(exc)
+    return None
+
+
+def print_plan(steps: list[Step], verbose: bool) -> None:
+    for step in steps:
+        if step.action == OK and not verbose:
+            continue
+        line = f"  {SYMBOLS[step.action]} {step.target}"
+        if step.source and step.action != PRUNE:
+            line += f" -> {step.source}"
+        if step.detail:
+            line += f"  ({step.detail})"
+        print(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("plan", "apply"), nargs="?", default="plan")
+    parser.add_argument("--backup", action="store_true", help="move conflicting files aside instead of failing")
+    parser.add_argument("--home", type=Path, default=Path(os.environ.get("DOTFILES_HOME", Path.home())))
+    parser.add_argument("--jobs", type=int, default=8, help="parallel stat workers")
+    parser.add_argument("-v", "--verbose", action="store_true", help="also list links that are already correct")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    links = load_manifest(args.home)
+    owned_path = state_file(args.home)
+    owned = load_owned(owned_path)
+    steps = plan(links, owned, args.jobs)
+    changes = [s for s in steps if s.action != OK]
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print_plan(steps, args.verbose)
+    if not changes:
+        # Still record ownership, e.g. for links made by hand before the manifest existed.
+        if args.command == "apply" and owned != links:
+            save_owned(owned_path, links)
+        print(f"{len(links)} links up to date ({elapsed:.1f} ms)")
+        return 0
+    if args.command == "plan":
+        print(f"{len(changes)} change(s) planned ({elapsed:.1f} ms); run `task dotfiles:link` to apply")
+        return 0
+
+    failed = 0
+    for step in changes:
+        error = apply_step(step, args.backup)
+        if error:
+            failed += 1
+            print(f"error: {step.target}: {error}", file=sys.stderr)
+            continue
+        if step.action == PRUNE:
+            owned.pop(step.target, None)
+        else:
+            owned[step.target] = step.source
+    for step in steps:
+        if step.action == OK:
+            if step.source is None:
+                owned.pop(step.target, None)
+            else:
+                owned[step.target] = step.source
+    save_owned(owned_path, owned)
+
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{len(changes) - failed} applied, {failed} failed ({elapsed:.1f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
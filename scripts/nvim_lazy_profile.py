@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""Profile Neovim startup and propose lazy-loading triggers for lua/plugins.
+
+lazy.lua sets ``defaults.lazy = false``, so every spec in ``lua/plugins/`` that
+doesn't declare a trigger loads at startup. This script:
+
+1. runs ``nvim --headless --startuptime`` over several samples and attributes
+   the time of every sourced file and ``require`` to the plugin it belongs to;
+2. reads each spec in ``lua/plugins/*.lua`` and works out whether it is
+   already lazy (``cmd``/``keys``/``event``/``ft``) or could be, based on what
+   it declares: ``<cmd>`` keymaps, user commands the plugin defines,
+   filetype-only plugins, colorschemes that are not applied, plugins that are
+   only pulled in as dependencies;
+3. prints the measured cost of each spec, the proposed trigger and the
+   expected startup time before and after.
+
+``--apply`` writes the proposed triggers into the spec files and, when
+profiling, measures startup again so the report shows real numbers.
+
+Usage:
+    nvim_lazy_profile.py [--samples N] [--apply]
+    nvim_lazy_profile.py --log startup1.log --log startup2.log   # analyse existing logs
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PLUGINS_DIR = REPO_ROOT / ".config" / "nvim" / "lua" / "plugins"
+LAZY_ROOT = Path(os.environ.get("XDG_DATA_HOME", Path.home() / ".local" / "share")) / "nvim" / "lazy"
+
+TRIGGERS = ("cmd", "keys", "event", "ft")
+STARTUP_LINE = re.compile(r"^\s*(\d+\.\d+)\s+(\d+\.\d+)(?:\s+(\d+\.\d+))?:\s+(.*)$")
+
+
+# -- startup profiling ---------------------------------------------------------
+
+
+def run_samples(samples: int, nvim: str) -> list[Path]:
+    logs = []
+    tmpdir = Path(tempfile.mkdtemp(prefix="nvim-startuptime-"))
+    for i in range(samples):
+        log = tmpdir / f"sample{i}.log"
+        subprocess.run(
+            [nvim, "--headless", "--startuptime", str(log), "+qa"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=60,
+            check=False,
+        )
+        logs.append(log)
+    return logs
+
+
+def module_owners(lazy_root: Path) -> dict[str, str]:
+    """Map top-level Lua module names to the plugin directory providing them."""
+    owners = {}
+    if lazy_root.is_dir():
+        for plugin in lazy_root.iterdir():
+            lua = plugin / "lua"
+            if lua.is_dir():
+                for entry in lua.iterdir():
+                    owners.setdefault(entry.name.removesuffix(".lua"), plugin.name)
+    return owners
+
+
+def parse_log(path: Path, owners: dict[str, str]) -> tuple[float, dict[str, float]]:
+    """Return (total startup ms, {plugin: self ms}) for one --startuptime log."""
+    total = 0.0
+    cost: dict[str, float] = {}
+    for line in path.read_text(errors="replace").splitlines():
+        match = STARTUP_LINE.match(line)
+        if not match:
+            continue
+        clock, self_ms, what = float(match[1]), match[3] or match[2], match[4]
+        total = max(total, clock)
+        plugin = None
+        lazy_dir = re.search(r"/lazy/([^/]+)/", what)
+        if what.startswith("sourcing") and lazy_dir:
+            plugin = lazy_dir[1]
+        elif what.startswith("require("):
+            module = re.match(r"require\('([^'.]+)", what)
+            plugin = owners.get(module[1]) if module else None
+        if plugin and match[3]:
+            cost[plugin] = cost.get(plugin, 0.0) + float(self_ms)
+    return total, cost
+
+
+def profile(logs: list[Path], lazy_root: Path) -> tuple[float, dict[str, float]]:
+    owners = module_owners(lazy_root)
+    totals, costs = [], {}
+    for log in logs:
+        total, cost = parse_log(log, owners)
+        totals.append(total)
+        for plugin, ms in cost.items():
+            costs.setdefault(plugin, []).append(ms)
+    if not totals:
+        return 0.0, {}
+    # A plugin missing from a sample cost nothing in it.
+    return statistics.median(totals), {
+        p: statistics.median(v + [0.0] * (len(totals) - len(v))) for p, v in costs.items()
+    }
+
+
+# -- spec parsing --------------------------------------------------------------
+
+
+def mask_lua(text: str, strings: bool = True) -> str:
+    """Blank out comments and, unless ``strings`` is false, string contents
+    (keeping quotes) so braces and keys can be found with plain regexes.
+    Offsets are preserved."""
+    out = list(text)
+    i, n = 0, len(text)
+    while i < n:
+        if text.startswith("--", i):
+            long = re.match(r"--\[(=*)\[", text[i:])
+            end = text.find(f"]{long[1]}]", i) + len(long[1]) + 2 if long else text.find("\n", i)
+            end = n if end < i else end
+            out[i:end] = " " * (end - i)
+            i = end
+        elif text[i] in "\"'":
+            quote, j = text[i], i + 1
+            while j < n and text[j] != quote:
+                j += 2 if text[j] == "\\" else 1
+            if strings:
+                out[i + 1 : j] = " " * (j - i - 1)
+            i = j + 1
+        elif strings and (text.startswith("[[", i) or re.match(r"\[=+\[", text[i:])):
+            level = re.match(r"\[(=*)\[", text[i:])[1]
+            end = text.find(f"]{level}]", i) + len(level) + 2
+            out[i:end] = " " * (end - i)
+            i = end
+        else:
+            i += 1
+    return "".join(out)
+
+
+@dataclass
+class Spec:
+    file: Path
+    repo: str
+    name: str
+    start: int  # offset of the opening brace
+    end: int  # offset of the closing brace
+    repo_end: int  # offset just past the repo string literal
+    fields: set[str] = field(default_factory=set)
+    text: str = ""  # the spec's source with comments blanked out
+
+
+def find_specs(path: Path) -> list[Spec]:
+    text = path.read_text()
+    masked = mask_lua(text)
+    code = mask_lua(text, strings=False)
+    specs, stack = [], []
+    for i, ch in enumerate(masked):
+        if ch == "{":
+            stack.append(i)
+        elif ch == "}" and stack:
+            start = stack.pop()
+            depth = len(stack)
+            before = masked[:start].rstrip()
+            positional = depth == 0 or before.endswith(("{", ","))
+            head = re.match(r'\{\s*(["\'])([\w.-]+/[\w.-]+)\1', text[start:])
+            if not (positional and head and depth <= 1):
+                continue
+            body = masked[start + 1 : i]
+            fields, level = set(), 0
+            for token in re.finditer(r"[{}]|\b([A-Za-z_]\w*)\s*=(?!=)", body):
+                if token[0] == "{":
+                    level += 1
+                elif token[0] == "}":
+                    level -= 1
+                elif level == 0:
+                    fields.add(token[1])
+            spec_text = code[start : i + 1]
+            name = re.search(r'\bname\s*=\s*"([^"]+)"', spec_text) if "name" in fields else None
+            repo = head[2]
+            specs.append(
+                Spec(
+                    file=path,
+                    repo=repo,
+                    name=name[1] if name else repo.split("/")[1].removesuffix(".git"),
+                    start=start,
+                    end=i,
+                    repo_end=start + head.end(),
+                    fields=fields,
+                    text=spec_text,
+                )
+            )
+    return specs
+
+
+# -- proposals -----------------------------------------------------------------
+
+
+def lua_list(items) -> str:
+    return "{ " + ", ".join(f'"{item}"' for item in items) + " }"
+
+
+def plugin_commands(plugin_dir: Path) -> list[str]:
+    """User commands a plugin defines in its plugin/ scripts."""
+    commands = []
+    for script in sorted((plugin_dir / "plugin").glob("*")):
+        if script.suffix in (".lua", ".vim"):
+            body = script.read_text(errors="replace")
+            commands += re.findall(r'nvim_create_user_command\(\s*["\'](\w+)', body)
+            commands += re.findall(r"^\s*command!?\s+(?:-\S+\s+)*([A-Z]\w*)", body, re.MULTILINE)
+    return list(dict.fromkeys(commands))
+
+
+def is_colorscheme(spec: Spec, lazy_root: Path) -> bool:
+    if (lazy_root / spec.name / "colors").is_dir():
+        return True
+    return spec.file.name == "theme.lua"
+
+
+def extends_existing_spec(spec: Spec, lazy_root: Path) -> bool:
+    """Whether the spec only tweaks a plugin LazyVim already defines."""
+    lazyvim = lazy_root / "LazyVim" / "lua" / "lazyvim" / "plugins"
+    if lazyvim.is_dir():
+        return any(f'"{spec.repo}"' in f.read_text(errors="replace") for f in lazyvim.rglob("*.lua"))
+    # Without a LazyVim checkout, `opts = function(_, opts)` is the telltale.
+    return bool(re.search(r"\bopts\s*=\s*function", spec.text)) and "config" not in spec.fields
+
+
+def propose(spec: Spec, specs: list[Spec], lazy_root: Path) -> tuple[str | None, str]:
+    """Return (lua fields to add or None, reason)."""
+    present = sorted(spec.fields & set(TRIGGERS))
+    if "lazy" in spec.fields:
+        return None, "explicit lazy setting kept"
+    if present:
+        return None, f"already lazy via {', '.join(present)}"
+
+    if extends_existing_spec(spec, lazy_root):
+        return None, "extends a LazyVim spec, which decides when it loads"
+
+    if is_colorscheme(spec, lazy_root):
+        if re.search(r"colorscheme\s+[\w-]+", spec.text):
+            return None, "applied colorscheme, must load at startup"
+        return "lazy = true", "colorscheme not applied; `:colorscheme` loads it on demand"
+
+    if any(spec.repo in s.text and s is not spec for s in specs) and "config" not in spec.fields:
+        return "lazy = true", "only used as a dependency; loaded on require()"
+
+    keymaps = re.findall(r"<cmd>\s*(\w+)", spec.text)
+    if keymaps:
+        return f"cmd = {lua_list(dict.fromkeys(keymaps))}", "commands used by its keymaps"
+
+    commands = plugin_commands(lazy_root / spec.name)
+    if commands:
+        return f"cmd = {lua_list(commands)}", "user commands it defines"
+
+    ftplugins = sorted({p.stem for p in (lazy_root / spec.name / "ftplugin").glob("*")})
+    if ftplugins and not (lazy_root / spec.name / "plugin").exists():
+        return f"ft = {lua_list(ftplugins)}", "only ships ftplugins"
+
+    return 'event = "VeryLazy"', "no declared trigger; defer until after the first screen"
+
+
+def apply_edit(text: str, spec: Spec, addition: str) -> str:
+    """Insert ``addition`` right after the spec's repo string, keeping its layout."""
+    pos = spec.repo_end
+    rest = text[pos:]
+    comma = re.match(r"[ \t]*,", rest)
+    if comma and re.match(r"[ \t]*,[ \t]*\n", rest):
+        indent = re.search(r"\n([ \t]*)[^\n]*$", text[:pos])
+        indent = indent[1] if indent else ""
+        after = pos + comma.end()
+        return text[:after] + f"\n{indent}{addition}," + text[after:]
+    if comma:
+        after = pos + comma.end()
+        return text[:after] + f" {addition}," + text[after:]
+    return text[:pos] + f", {addition}" + text[pos:]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=10, help="headless startups to average over")
+    parser.add_argument("--nvim", default="nvim")
+    parser.add_argument("--log", type=Path, action="append", help="analyse existing --startuptime logs instead")
+    parser.add_argument("--lazy-root", type=Path, default=LAZY_ROOT)
+    parser.add_argument("--apply", action="store_true", help="write the proposed triggers into the spec files")
+    args = parser.parse_args(argv)
+
+    try:
+        logs = args.log or run_samples(args.samples, args.nvim)
+    except FileNotFoundError:
+        print(f"error: {args.nvim} not found; pass --log to analyse existing startup logs", file=sys.stderr)
+        return 1
+    before, costs = profile(logs, args.lazy_root)
+
+    specs = [s for path in sorted(PLUGINS_DIR.glob("*.lua")) for s in find_specs(path)]
+    rows, saving = [], 0.0
+    for spec in specs:
+        addition, reason = propose(spec, specs, args.lazy_root)
+        ms = costs.get(spec.name, 0.0)
+        if addition:
+            saving += ms
+        rows.append((spec, addition, reason, ms))
+
+    print(f"{'spec':<28} {'file':<16} {'startup':>8}  proposal")
+    for spec, addition, reason, ms in sorted(rows, key=lambda r: -r[3]):
+        print(f"{spec.name:<28} {spec.file.name:<16} {ms:>6.2f}ms  {addition or '-'}  ({reason})")
+    print(f"\nstartup before: {before:.1f} ms (median of {len(logs)})")
+    print(f"expected after: {before - saving:.1f} ms (-{saving:.1f} ms)")
+
+    if args.apply:
+        changed = {}
+        # Edit back to front so earlier offsets stay valid.
+        for spec, addition, _, _ in sorted(rows, key=lambda r: -r[0].start):
+            if addition:
+                text = changed.get(spec.file, spec.file.read_text())
+                changed[spec.file] = apply_edit(text, spec, addition)
+        for path, text in changed.items():
+            path.write_text(text)
+            print(f"updated {path.relative_to(REPO_ROOT)}")
+        if changed and not args.log:
+            after, _ = profile(run_samples(args.samples, args.nvim), args.lazy_root)
+            print(f"measured after: {after:.1f} ms ({after - before:+.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""Offline mirror of the pinned Neovim plugins and Mason tools.
+
+``build`` packs exactly what this config pins into a local store:
+
+* every plugin in ``lazy-lock.json`` goes into a bare repository per upstream
+  URL under ``git/``, with its branch ref set to the locked commit. A re-run
+  only fetches when that commit isn't in the store yet.
+* every tool in ``lua/plugins/mason.lua``'s ``ensure_installed`` is packed
+  from an existing Mason install into a deterministic tarball stored by
+  sha256 under ``blobs/``. Identical content is stored once, and tools whose
+  receipt hasn't changed are skipped.
+
+``bootstrap`` installs from the store: it clones each plugin at its pinned
+commit into lazy.nvim's root and unpacks Mason packages, together with their
+bin/share/opt links and the registry, all in parallel and without network
+access. After that, lazy.nvim and Mason find everything already installed.
+Cloned plugins keep their real upstream as ``origin``, so ``:Lazy update``
+still works later.
+
+Plugin sources are the local lazy.nvim checkouts when they contain the locked
+commit, otherwise ``--upstream``, a URL template such as
+``file:///srv/mirror/{name}.git``.
+
+Usage:
+    nvim_mirror.py build [--upstream TEMPLATE]
+    nvim_mirror.py bootstrap
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+NVIM_CONFIG = REPO_ROOT / ".config" / "nvim"
+LOCKFILE = NVIM_CONFIG / "lazy-lock.json"
+MASON_SPEC = NVIM_CONFIG / "lua" / "plugins" / "mason.lua"
+
+HOME = Path.home()
+XDG_DATA = Path(os.environ.get("XDG_DATA_HOME", HOME / ".local" / "share"))
+XDG_CACHE = Path(os.environ.get("XDG_CACHE_HOME", HOME / ".cache"))
+DEFAULT_STORE = Path(os.environ.get("DOTFILES_NVIM_MIRROR", XDG_CACHE / "dotfiles" / "nvim-mirror"))
+MASON_LINK_KINDS = ("bin", "share", "opt")
+
+
+class MirrorError(Exception):
+    pass
+
+
+def git(*args: str, cwd: Path | None = None) -> str:
+    out = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise MirrorError(f"git {' '.join(args)}: {out.stderr.strip()}")
+    return out.stdout.strip()
+
+
+def has_commit(repo: Path, commit: str) -> bool:
+    out = subprocess.run(
+        ["git", "-C", str(repo), "cat-file", "-e", f"{commit}^{{commit}}"],
+        capture_output=True,
+    )
+    return out.returncode == 0
+
+
+def mason_tools() -> list[str]:
+    """The package names listed in mason.lua's ensure_installed."""
+    body = MASON_SPEC.read_text()
+    block = body[body.index("vim.list_extend(opts.ensure_installed") :]
+    return re.findall(r'^\s*"([^"]+)",', block, re.MULTILINE)
+
+
+class Store:
+    def __init__(self, root: Path):
+        self.root = root
+        self.index_path = root / "index.json"
+        try:
+            self.index = json.loads(self.index_path.read_text())
+        except FileNotFoundError:
+            self.index = {"plugins": {}, "mason": {}, "registries": None}
+
+    def repo_for(self, url: str) -> Path:
+        return self.root / "git" / (hashlib.sha256(url.encode()).hexdigest()[:16] + ".git")
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / "sha256" / digest[:2] / digest
+
+    def put_blob(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".tmp{os.getpid()}")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+        return digest
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.index, indent=2, sort_keys=True) + "\n")
+        tmp.replace(self.index_path)
+
+
+def pack_dir(path: Path) -> bytes:
+    """Tar+gzip a directory deterministically, so equal trees give equal hashes."""
+
+    def normalize(info: tarfile.TarInfo) -> tarfile.TarInfo:
+        info.mtime = 0
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+        return info
+
+    raw = io.BytesIO()
+    with tarfile.open(fileobj=raw, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        for entry in sorted(path.rglob("*")):
+            tar.add(entry, arcname=str(entry.relative_to(path)), recursive=False, filter=normalize)
+    out = io.BytesIO()
+    with gzip.GzipFile(fileobj=out, mode="wb", mtime=0) as gz:
+        gz.write(raw.getvalue())
+    return out.getvalue()
+
+
+# -- build ---------------------------------------------------------------------
+
+
+def mirror_plugin(store: Store, name: str, pin: dict, lazy_root: Path, upstream: str | None) -> str:
+    commit, branch = pin["commit"], pin["branch"]
+    local = lazy_root / name
+    url = None
+    if (local / ".git").exists():
+        url = git("-C", str(local), "remote", "get-url", "origin")
+    elif upstream:
+        url = upstream.format(name=name)
+    known = store.index["plugins"].get(name, {})
+    url = url or known.get("url")
+    if not url:
+        raise MirrorError("no local checkout and no --upstream to fetch from")
+
+    repo = store.repo_for(url)
+    if known.get("commit") == commit and has_commit(repo, commit):
+        return "cached"
+
+    if not repo.exists():
+        repo.parent.mkdir(parents=True, exist_ok=True)
+        git("init", "--quiet", "--bare", str(repo))
+    if not has_commit(repo, commit):
+        # Prefer the local checkout; fall back to upstream if it lacks the commit.
+        sources = [str(local)] if has_commit(local, commit) else []
+        sources += [s for s in (upstream.format(name=name) if upstream else None, url) if s]
+        for source in dict.fromkeys(sources):
+            # Fetching the branch works everywhere; asking for the bare commit
+            # covers checkouts whose branch has since moved past the pin.
+            for refspec in (branch, commit):
+                subprocess.run(
+                    ["git", "-C", str(repo), "fetch", "--quiet", "--no-write-fetch-head", source, refspec],
+                    capture_output=True,
+                )
+                if has_commit(repo, commit):
+                    break
+            if has_commit(repo, commit):
+                break
+        else:
+            raise MirrorError(f"commit {commit[:12]} not found in {', '.join(sources)}")
+
+    git("-C", str(repo), "update-ref", f"refs/heads/{branch}", commit)
+    git("-C", str(repo), "symbolic-ref", "HEAD", f"refs/heads/{branch}")
+    store.index["plugins"][name] = {
+        "url": url,
+        "branch": branch,
+        "commit": commit,
+        "repo": str(repo.relative_to(store.root)),
+    }
+    return "fetched"
+
+
+def mirror_tool(store: Store, name: str, mason_root: Path) -> str:
+    package = mason_root / "packages" / name
+    receipt_path = package / "mason-receipt.json"
+    if not receipt_path.is_file():
+        if name in store.index["mason"]:
+            return "cached (not installed locally)"
+        raise MirrorError(f"not installed in {mason_root}")
+    receipt_text = receipt_path.read_text()
+    receipt_digest = hashlib.sha256(receipt_text.encode()).hexdigest()
+    known = store.index["mason"].get(name, {})
+    if known.get("receipt") == receipt_digest and store.blob_path(known["blob"]).exists():
+        return "cached"
+
+    digest = store.put_blob(pack_dir(package))
+    receipt = json.loads(receipt_text)
+    store.index["mason"][name] = {
+        "blob": digest,
+        "receipt": receipt_digest,
+        "links": receipt.get("links", {}),
+    }
+    return "packed"
+
+
+def build(args: argparse.Namespace) -> int:
+    store = Store(args.store)
+    pins = json.loads(args.lockfile.read_text())
+    jobs = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        for name, pin in pins.items():
+            jobs.append((f"plugin {name}", pool.submit(mirror_plugin, store, name, pin, args.lazy_root, args.upstream)))
+        if not args.no_mason:
+            for tool in mason_tools():
+                jobs.append((f"mason {tool}", pool.submit(mirror_tool, store, tool, args.mason_root)))
+        failed = report(jobs)
+
+    registries = args.mason_root / "registries"
+    if not args.no_mason and registries.is_dir():
+        store.index["registries"] = store.put_blob(pack_dir(registries))
+    store.save()
+    return 1 if failed else 0
+
+
+# -- bootstrap -----------------------------------------------------------------
+
+
+def install_plugin(store: Store, name: str, pin: dict, lazy_root: Path) -> str:
+    entry = store.index["plugins"].get(name)
+    if entry is None or entry["commit"] != pin["commit"]:
+        raise MirrorError("not in the mirror at the locked commit; run `build` first")
+    dest = lazy_root / name
+    if (dest / ".git").exists():
+        if git("-C", str(dest), "rev-parse", "HEAD") == pin["commit"]:
+            return "present"
+        raise MirrorError(f"{dest} exists at a different commit; leaving it alone")
+
+    tmp = dest.with_name(f".{name}.mirror-tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    git("clone", "--quiet", "--branch", entry["branch"], str(store.root / entry["repo"]), str(tmp))
+    git("-C", str(tmp), "remote", "set-url", "origin", entry["url"])
+    tmp.replace(dest)
+    return "cloned"
+
+
+def install_tool(store: Store, name: str, mason_root: Path) -> str:
+    entry = store.index["mason"].get(name)
+    if entry is None:
+        raise MirrorError("not in the mirror; run `build` on a provisioned machine first")
+    package = mason_root / "packages" / name
+    if (package / "mason-receipt.json").is_file():
+        return "present"
+
+    tmp = package.with_name(f".{name}.mirror-tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    with tarfile.open(store.blob_path(entry["blob"])) as tar:
+        tar.extractall(tmp, filter="tar")
+    tmp.replace(package)
+
+    for kind in MASON_LINK_KINDS:
+        for link_name, rel in entry["links"].get(kind, {}).items():
+            link = mason_root / kind / link_name
+            link.parent.mkdir(parents=True, exist_ok=True)
+            if link.is_symlink() or link.exists():
+                link.unlink()
+            link.symlink_to(package / rel)
+    return "unpacked"
+
+
+def bootstrap(args: argparse.Namespace) -> int:
+    store = Store(args.store)
+    if not store.index_path.exists():
+        print(f"error: no mirror at {args.store}; run `build` first", file=sys.stderr)
+        return 1
+    pins = json.loads(args.lockfile.read_text())
+    args.lazy_root.mkdir(parents=True, exist_ok=True)
+    (args.mason_root / "packages").mkdir(parents=True, exist_ok=True)
+
+    jobs = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        for name, pin in pins.items():
+            jobs.append((f"plugin {name}", pool.submit(install_plugin, store, name, pin, args.lazy_root)))
+        if not args.no_mason:
+            for tool in mason_tools():
+                jobs.append((f"mason {tool}", pool.submit(install_tool, store, tool, args.mason_root)))
+        failed = report(jobs)
+
+    registries = args.mason_root / "registries"
+    if not args.no_mason and store.index.get("registries") and not registries.exists():
+        with tarfile.open(store.blob_path(store.index["registries"])) as tar:
+            tar.extractall(registries, filter="tar")
+    return 1 if failed else 0
+
+
+# -- cli -----------------------------------------------------------------------
+
+
+def report(jobs: list) -> int:
+    start = time.perf_counter()
+    counts: dict[str, int] = {}
+    failed = 0
+    for label, future in jobs:
+        try:
+            status = future.result()
+        except MirrorError as exc:
+            failed += 1
+            print(f"  error   {label}: {exc}", file=sys.stderr)
+            continue
+        counts[status] = counts.get(status, 0) + 1
+        if not status.startswith(("cached", "present")):
+            print(f"  {status:<7} {label}")
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(f"{summary or 'nothing done'}, {failed} failed ({time.perf_counter() - start:.1f} s)")
+    return failed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("build", "bootstrap"))
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE)
+    parser.add_argument("--lockfile", type=Path, default=LOCKFILE)
+    parser.add_argument("--upstream", help="URL template for plugins without a local checkout, e.g. file:///m/{name}.git")
+    parser.add_argument("--lazy-root", type=Path, default=XDG_DATA / "nvim" / "lazy")
+    parser.add_argument("--mason-root", type=Path, default=XDG_DATA / "nvim" / "mason")
+    parser.add_argument("--no-mason", action="store_true", help="only handle lazy.nvim plugins")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args(argv)
+    return build(args) if args.command == "build" else bootstrap(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Split .config/vscode/Default.code-profile into readable files and back.
+
+A VSCode profile export is a single line of JSON whose sections (settings,
+keybindings, snippets, extensions, globalState) are themselves JSON encoded
+into strings. ``split`` writes each section as normal files under
+``.config/vscode/Default/``:
+
+    settings.json        the settings exactly as VSCode shows them
+    keybindings.json     likewise
+    snippets/<name>      one file per snippet file
+    extensions.json      the extension list, one entry per line
+    globalState.json     the UI state, one key per line
+    profile.json         name, key order and per-section hashes
+
+``join`` rebuilds the profile, byte for byte, from those files. Sections are
+scanned one string token at a time and hashed on both sides, so ``sync``
+only rewrites the sections that changed. It works in whichever direction
+changed since the last run and refuses if both sides changed the same
+section.
+
+Usage:
+    vscode_profile.py split|join|sync|check [--profile FILE] [--dir DIR]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+from json.decoder import scanstring
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PROFILE = REPO_ROOT / ".config" / "vscode" / "Default.code-profile"
+SPLIT_DIR = PROFILE.with_suffix("")
+META = "profile.json"
+
+# Section -> the key inside its decoded wrapper that holds the interesting part.
+MAIN_KEYS = {"settings": "settings", "keybindings": "keybindings", "snippets": "snippets", "globalState": "storage"}
+
+
+class ProfileError(Exception):
+    pass
+
+
+def sha(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def scan_sections(raw: str) -> list[tuple[str, str]]:
+    """Return [(key, raw JSON token)] for the top-level object, in order.
+
+    Only string tokens are sliced out; nothing is decoded but the keys.
+    """
+    sections = []
+    pos = raw.index("{") + 1
+    while True:
+        pos = _skip_ws(raw, pos)
+        if raw[pos] == "}":
+            return sections
+        if raw[pos] != '"':
+            raise ProfileError(f"expected a key at offset {pos}")
+        key, pos = scanstring(raw, pos + 1)
+        pos = _skip_ws(raw, pos)
+        if raw[pos] != ":":
+            raise ProfileError(f"expected ':' at offset {pos}")
+        start = _skip_ws(raw, pos + 1)
+        if raw[start] == '"':
+            _, end = scanstring(raw, start + 1)
+        else:
+            _, end = json.JSONDecoder().raw_decode(raw, start)
+        sections.append((key, raw[start:end]))
+        pos = _skip_ws(raw, end)
+        if raw[pos] == ",":
+            pos += 1
+
+
+def _skip_ws(raw: str, pos: int) -> int:
+    while raw[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+
+def encode_token(value) -> str:
+    """How VSCode writes a section: compact inner JSON inside a JSON string,
+    with non-ASCII characters left unescaped at both levels (like JSON.stringify)."""
+    if not isinstance(value, str):
+        value = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return json.dumps(value, ensure_ascii=False)
+
+
+# -- section <-> files ---------------------------------------------------------
+
+
+def section_files(key: str, token: str) -> tuple[dict[str, str], dict]:
+    """Decode one section into {relative path: text} plus what's needed to rebuild it."""
+    value = json.loads(token)
+    if key == "name" or not isinstance(value, str):
+        return {}, {"value": value}
+    inner = json.loads(value)
+    main = MAIN_KEYS.get(key)
+    if isinstance(inner, dict) and main in inner:
+        rest = {k: v for k, v in inner.items() if k != main}
+        order = list(inner)
+        part = inner[main]
+        if isinstance(part, str):
+            return {f"{key}.json": part}, {"order": order, "extra": rest, "kind": "text"}
+        if key == "snippets":
+            return {f"snippets/{name}": text for name, text in part.items()}, {
+                "order": order, "extra": rest, "kind": "snippets", "names": list(part),
+            }
+        return {f"{key}.json": _pretty(part)}, {"order": order, "extra": rest, "kind": "json"}
+    return {f"{key}.json": _pretty(inner)}, {"kind": "whole"}
+
+
+def _pretty(value) -> str:
+    if isinstance(value, list):
+        lines = [json.dumps(item, ensure_ascii=False) for item in value]
+        return "[\n" + ",\n".join(f"  {line}" for line in lines) + "\n]\n"
+    return json.dumps(value, indent=2, ensure_ascii=False) + "\n"
+
+
+def section_token(key: str, info: dict, directory: Path) -> str:
+    """Rebuild a section's raw token from the split files."""
+    kind = info.get("kind")
+    if kind is None:
+        return json.dumps(info["value"], ensure_ascii=False)
+    if kind == "whole":
+        return encode_token(json.loads((directory / f"{key}.json").read_text()))
+    main = MAIN_KEYS[key]
+    if kind == "text":
+        part = (directory / f"{key}.json").read_text()
+    elif kind == "snippets":
+        snippet_dir = directory / "snippets"
+        names = [n for n in info["names"] if (snippet_dir / n).exists()]
+        names += sorted(p.name for p in snippet_dir.iterdir() if p.name not in names)
+        part = {name: (snippet_dir / name).read_text() for name in names}
+    else:
+        part = json.loads((directory / f"{key}.json").read_text())
+    wrapper = {k: (part if k == main else info["extra"][k]) for k in info["order"]}
+    return encode_token(wrapper)
+
+
+def files_digest(key: str, info: dict, directory: Path) -> str:
+    if info.get("kind") is None:
+        return sha(json.dumps(info["value"], ensure_ascii=False))
+    if info["kind"] == "snippets":
+        paths = sorted((directory / "snippets").glob("*"))
+    else:
+        paths = [directory / f"{key}.json"]
+    return sha("".join(p.name + "\0" + p.read_text() for p in paths if p.exists()))
+
+
+# -- commands ------------------------------------------------------------------
+
+
+def load_meta(directory: Path) -> dict:
+    try:
+        return json.loads((directory / META).read_text())
+    except FileNotFoundError:
+        return {"order": [], "sections": {}}
+
+
+def save_meta(directory: Path, meta: dict) -> None:
+    (directory / META).write_text(json.dumps(meta, indent=2, ensure_ascii=False) + "\n")
+
+
+def split(profile: Path, directory: Path, only: set[str] | None = None) -> list[str]:
+    raw = profile.read_text()
+    meta = load_meta(directory)
+    sections = scan_sections(raw)
+    if "{" + ",".join(f"{json.dumps(k)}:{t}" for k, t in sections) + "}" != raw:
+        raise ProfileError(f"{profile} is not in VSCode's compact layout; refusing to split")
+
+    changed = []
+    meta["order"] = [key for key, _ in sections]
+    for key, token in sections:
+        known = meta["sections"].get(key, {})
+        if (only is not None and key not in only) or known.get("profile") == sha(token):
+            continue
+        files, info = section_files(key, token)
+        if key == "snippets":
+            for stale in (directory / "snippets").glob("*"):
+                if f"snippets/{stale.name}" not in files:
+                    stale.unlink()
+        for rel, text in files.items():
+            path = directory / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+        if section_token(key, info, directory) != token:
+            raise ProfileError(f"section {key!r} does not round-trip byte for byte")
+        meta["sections"][key] = {**info, "profile": sha(token), "files": files_digest(key, info, directory)}
+        changed.append(key)
+    save_meta(directory, meta)
+    return changed
+
+
+def join(profile: Path, directory: Path, only: set[str] | None = None) -> list[str]:
+    meta = load_meta(directory)
+    if not meta["order"]:
+        raise ProfileError(f"{directory} has no {META}; run split first")
+    try:
+        existing = dict(scan_sections(profile.read_text()))
+    except FileNotFoundError:
+        existing = {}
+
+    changed, parts = [], []
+    for key in meta["order"]:
+        info = meta["sections"][key]
+        digest = files_digest(key, info, directory)
+        token = existing.get(key)
+        if token is None or (digest != info["files"] and (only is None or key in only)):
+            token = section_token(key, info, directory)
+            info.update(profile=sha(token), files=digest)
+            changed.append(key)
+        parts.append(f"{json.dumps(key)}:{token}")
+    if changed:
+        profile.write_text("{" + ",".join(parts) + "}")
+        save_meta(directory, meta)
+    return changed
+
+
+def sync(profile: Path, directory: Path) -> tuple[list[str], list[str]]:
+    meta = load_meta(directory)
+    if not profile.exists():
+        if not meta["order"]:
+            raise ProfileError(f"neither {profile} nor {directory / META} exists")
+        # The profile is regenerated from the split files; rebuild all of it.
+        return [], join(profile, directory)
+    if not meta["order"]:
+        return split(profile, directory), []
+    current = dict(scan_sections(profile.read_text()))
+    from_profile, from_files = set(), set()
+    for key in set(meta["order"]) | set(current):
+        info = meta["sections"].get(key)
+        if info is None or sha(current.get(key, "")) != info["profile"]:
+            from_profile.add(key)
+        if info is not None and files_digest(key, info, directory) != info["files"]:
+            from_files.add(key)
+    conflicts = from_profile & from_files
+    if conflicts:
+        raise ProfileError(f"both the profile and the split files changed: {', '.join(sorted(conflicts))}")
+    pulled = split(profile, directory, from_profile) if from_profile else []
+    pushed = join(profile, directory, from_files) if from_files else []
+    return pulled, pushed
+
+
+def check(profile: Path, directory: Path) -> bool:
+    if not profile.exists():
+        return False
+    raw = profile.read_text()
+    meta = load_meta(directory)
+    rebuilt = "{" + ",".join(
+        f"{json.dumps(key)}:{section_token(key, meta['sections'][key], directory)}" for key in meta["order"]
+    ) + "}"
+    return rebuilt == raw
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("split", "join", "sync", "check"))
+    parser.add_argument("--profile", type=Path, default=PROFILE)
+    parser.add_argument("--dir", type=Path, default=SPLIT_DIR)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "split":
+            args.dir.mkdir(parents=True, exist_ok=True)
+            changed = split(args.profile, args.dir)
+            print(f"split: {', '.join(changed) or 'nothing changed'}")
+        elif args.command == "join":
+            changed = join(args.profile, args.dir)
+            print(f"join: {', '.join(changed) or 'nothing changed'}")
+        elif args.command == "sync":
+            args.dir.mkdir(parents=True, exist_ok=True)
+            pulled, pushed = sync(args.profile, args.dir)
+            print(f"from profile: {', '.join(pulled) or '-'}; to profile: {', '.join(pushed) or '-'}")
+        else:
+            ok = check(args.profile, args.dir)
+            print("round-trip: identical" if ok else "round-trip: differs (run sync)")
+            return 0 if ok else 1
+    except ProfileError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
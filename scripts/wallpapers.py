@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Build screen-sized wallpaper variants and an index that WezTerm can read.
+
+The originals in ``wallpapers/`` are multi-megabyte Unsplash JPEGs. ``build``
+downscales each one, using a process pool, to cover every resolution listed in
+``wallpapers/wallpapers.json`` and re-encodes it as a progressive JPEG. It
+also writes ``index.json`` with dimensions, dominant colours and a light/dark
+classification for every wallpaper.
+
+Variants are named by the sha256 of their original, so only new or changed
+originals are reprocessed and variants of deleted originals are removed.
+An unchanged file isn't even re-hashed, because its size and mtime are cached.
+
+Output goes to ``$XDG_CACHE_HOME/dotfiles/wallpapers``. ``pick`` prints the
+variant to use for a given appearance and screen size, for rotation scripts.
+
+Needs Pillow (``pip install --user pillow``).
+
+Usage:
+    wallpapers.py build [--jobs N]
+    wallpapers.py pick [--appearance dark|light] [--resolution WxH] [--name NAME | --random]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SOURCE_DIR = REPO_ROOT / "wallpapers"
+CONFIG = SOURCE_DIR / "wallpapers.json"
+XDG_CACHE = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+OUT_DIR = Path(os.environ.get("DOTFILES_WALLPAPER_CACHE", XDG_CACHE / "dotfiles" / "wallpapers"))
+INDEX = OUT_DIR / "index.json"
+EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+# Mean luminance (0-1) below which a wallpaper counts as dark.
+DARK_THRESHOLD = 0.45
+
+
+def parse_resolution(text: str) -> tuple[int, int]:
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def process(source: str, digest: str, resolutions: list[str], quality: int) -> dict:
+    """Decode one original and write all its variants. Runs in a worker process."""
+    from PIL import Image, ImageStat
+
+    src = Path(source)
+    with Image.open(src) as original:
+        width, height = original.size
+        largest = max((parse_resolution(r) for r in resolutions), key=lambda wh: wh[0] * wh[1])
+        # Let the JPEG decoder skip detail we'd throw away anyway.
+        original.draft("RGB", (largest[0], largest[1]))
+        image = original.convert("RGB")
+
+    thumb = image.resize((64, 64), Image.Resampling.BILINEAR)
+    luminance = ImageStat.Stat(thumb.convert("L")).mean[0] / 255
+    palette = thumb.quantize(colors=5)
+    counts = sorted(palette.getcolors(), reverse=True)
+    rgb = palette.getpalette()
+    colors = ["#{:02x}{:02x}{:02x}".format(*rgb[i * 3 : i * 3 + 3]) for _, i in counts[:3]]
+
+    variants = {}
+    for resolution in resolutions:
+        target_w, target_h = parse_resolution(resolution)
+        # Cover the screen without cropping and never upscale.
+        scale = min(1.0, max(target_w / width, target_h / height))
+        size = (round(width * scale), round(height * scale))
+        out = OUT_DIR / resolution / f"{digest[:16]}.jpg"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        resized = image.resize(size, Image.Resampling.LANCZOS) if size != image.size else image
+        resized.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+        variants[resolution] = {"path": str(out), "width": size[0], "height": size[1], "bytes": out.stat().st_size}
+
+    return {
+        "name": src.stem,
+        "source": str(src.relative_to(REPO_ROOT)),
+        "sha256": digest,
+        "width": width,
+        "height": height,
+        "colors": colors,
+        "luminance": round(luminance, 3),
+        "appearance": "dark" if luminance < DARK_THRESHOLD else "light",
+        "variants": variants,
+    }
+
+
+def load_index() -> dict:
+    try:
+        return json.loads(INDEX.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"wallpapers": []}
+
+
+def build(args: argparse.Namespace) -> int:
+    config = json.loads(CONFIG.read_text())
+    resolutions = config["resolutions"]
+    quality = config.get("quality", 85)
+    start = time.perf_counter()
+
+    previous = {w["source"]: w for w in load_index().get("wallpapers", [])}
+    sources = sorted(p for p in SOURCE_DIR.iterdir() if p.suffix.lower() in EXTENSIONS)
+
+    entries, todo = {}, []
+    for path in sources:
+        rel = str(path.relative_to(REPO_ROOT))
+        st = path.stat()
+        known = previous.get(rel)
+        stamp = [st.st_size, st.st_mtime_ns]
+        digest = known["sha256"] if known and known.get("stamp") == stamp else sha256_file(path)
+        fresh = (
+            known
+            and known["sha256"] == digest
+            and set(known["variants"]) == set(resolutions)
+            and all(Path(v["path"]).exists() for v in known["variants"].values())
+        )
+        if fresh:
+            entries[rel] = {**known, "stamp": stamp}
+        else:
+            todo.append((path, digest, stamp))
+
+    if todo:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            print("error: Pillow is required (pip install --user pillow)", file=sys.stderr)
+            return 1
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = [
+                (path, stamp, pool.submit(process, str(path), digest, resolutions, quality))
+                for path, digest, stamp in todo
+            ]
+            for path, stamp, future in futures:
+                entry = future.result()
+                entry["stamp"] = stamp
+                entries[entry["source"]] = entry
+                print(f"  built {path.name} ({entry['appearance']}, {', '.join(entry['colors'])})")
+
+    # Drop variants that no current original produced.
+    keep = {Path(v["path"]) for e in entries.values() for v in e["variants"].values()}
+    removed = 0
+    for resolution_dir in (d for d in OUT_DIR.iterdir() if d.is_dir()):
+        for variant in resolution_dir.glob("*.jpg"):
+            if variant not in keep:
+                variant.unlink()
+                removed += 1
+
+    index = {"resolutions": resolutions, "wallpapers": [entries[k] for k in sorted(entries)]}
+    # WezTerm watches index.json; never let it reload on a half-written file.
+    tmp = INDEX.with_suffix(".tmp")
+    tmp.write_text(json.dumps(index, indent=2) + "\n")
+    tmp.replace(INDEX)
+
+    original = sum(p.stat().st_size for p in sources)
+    smallest = min(resolutions, key=lambda r: parse_resolution(r)[0])
+    variant_bytes = sum(e["variants"][smallest]["bytes"] for e in entries.values())
+    print(
+        f"{len(todo)} processed, {len(sources) - len(todo)} cached, {removed} stale variant(s) removed "
+        f"in {time.perf_counter() - start:.1f} s"
+    )
+    print(f"originals {original / 1e6:.1f} MB -> {smallest} variants {variant_bytes / 1e6:.1f} MB")
+    return 0
+
+
+def pick(args: argparse.Namespace) -> int:
+    wallpapers = load_index().get("wallpapers", [])
+    if args.appearance:
+        wallpapers = [w for w in wallpapers if w["appearance"] == args.appearance] or wallpapers
+    if args.name:
+        wallpapers = [w for w in wallpapers if args.name in w["name"]]
+    if not wallpapers:
+        print("error: no matching wallpaper; run `task wallpapers:build`", file=sys.stderr)
+        return 1
+    wallpaper = random.choice(wallpapers) if args.random else wallpapers[0]
+
+    # Smallest variant that still covers the screen, else the largest one.
+    want_w, want_h = parse_resolution(args.resolution)
+    variants = sorted(wallpaper["variants"].values(), key=lambda v: v["width"] * v["height"])
+    covering = [v for v in variants if v["width"] >= want_w and v["height"] >= want_h]
+    print((covering or variants[-1:])[0]["path"])
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_p = sub.add_parser("build", help="generate variants and index.json")
+    build_p.add_argument("--jobs", type=int, default=os.cpu_count())
+    pick_p = sub.add_parser("pick", help="print the variant path to use")
+    pick_p.add_argument("--appearance", choices=("dark", "light"))
+    pick_p.add_argument("--resolution", default="1920x1080")
+    pick_p.add_argument("--name", help="substring of the wallpaper file name")
+    pick_p.add_argument("--random", action="store_true")
+    args = parser.parse_args(argv)
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    return build(args) if args.command == "build" else pick(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())